@@ -0,0 +1,204 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple, Set, Any, Iterable
+
+from node import Node
+from storage import create_storage, BACKENDS
+
+logger = logging.getLogger('inlock_api')
+
+# (node_id, action, user_id, recipient_id) in timestamp order, per asset
+ChainEntry = Tuple[str, str, str, Optional[str]]
+
+def _hash_chunk(nodes: List[Node]) -> Tuple[int, List[str]]:
+    mismatches = [node.node_id for node in nodes if node.hash != node._calculate_hash()]
+    return len(nodes), mismatches
+
+def _chain_chunk(chains: List[Tuple[str, List[ChainEntry]]]) -> Tuple[int, List[str]]:
+    # Same rule as DAG.verify_integrity: each transfer must be initiated by
+    # the owner established by the previous ownership entry
+    errors = []
+    for asset_id, entries in chains:
+        owner = None
+        for node_id, action, user_id, recipient_id in entries:
+            if action == "register":
+                owner = user_id
+            elif action == "transfer" and recipient_id is not None:
+                if owner is not None and user_id != owner:
+                    errors.append(f"Transfer node {node_id} of asset {asset_id} has invalid initiator")
+                owner = recipient_id
+    return len(chains), errors
+
+def _chunks(items: List, size: int) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+class ParallelAudit:
+    """Full integrity audit that spreads hash and ownership-chain checks over a process pool.
+
+    References and tips need the whole node set, so they are checked in the
+    parent while the workers run.
+    """
+
+    def __init__(
+        self,
+        nodes: List[Node],
+        tips: Set[str],
+        asset_index: Dict[str, List[Tuple[float, str]]] = None,
+        workers: int = None,
+        chunk_size: int = 5000,
+        max_reported: int = 100
+    ):
+        self.nodes = nodes
+        self.tips = tips
+        self.asset_index = asset_index
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.max_reported = max_reported
+        self.status: Dict[str, Any] = {
+            "status": "pending",
+            "phase": None,
+            "workers": self.workers,
+            "nodes_checked": 0,
+            "nodes_total": len(nodes),
+            "assets_checked": 0,
+            "assets_total": 0,
+            "hash_mismatch_count": 0,
+            "hash_mismatches": [],
+            "reference_errors": [],
+            "chain_errors": [],
+            "tips_ok": None,
+            "started_at": None,
+            "finished_at": None
+        }
+
+    def _report(self, key: str, errors: List[str]):
+        room = self.max_reported - len(self.status[key])
+        if room > 0:
+            self.status[key].extend(errors[:room])
+
+    def _chains(self) -> List[Tuple[str, List[ChainEntry]]]:
+        by_id = {node.node_id: node for node in self.nodes}
+        if self.asset_index is None:
+            index: Dict[str, List[Tuple[float, str]]] = {}
+            for node in self.nodes:
+                index.setdefault(node.asset_id, []).append((node.timestamp, node.node_id))
+            for entries in index.values():
+                entries.sort(key=lambda e: e[0])
+        else:
+            index = self.asset_index
+
+        chains = []
+        for asset_id, entries in index.items():
+            chain = []
+            for _, node_id in entries:
+                node = by_id[node_id]
+                # Only transfers carry a recipient; register data may be any JSON
+                recipient_id = node.data.get("recipient_id") if node.action == "transfer" else None
+                chain.append((node.node_id, node.action, node.user_id, recipient_id))
+            chains.append((asset_id, chain))
+        return chains
+
+    def _check_references(self):
+        node_ids = {node.node_id for node in self.nodes}
+        referenced = set()
+        for node in self.nodes:
+            for ref in node.references:
+                if ref not in node_ids:
+                    self._report("reference_errors", [f"Node {node.node_id} references non-existent node {ref}"])
+                referenced.add(ref)
+
+        computed_tips = node_ids - referenced
+        self.status["tips_ok"] = computed_tips == self.tips
+        if not self.status["tips_ok"]:
+            logger.warning(f"Audit found tips inconsistency: {len(self.tips - computed_tips)} extra, "
+                           f"{len(computed_tips - self.tips)} missing")
+
+    def run(self) -> Dict[str, Any]:
+        status = self.status
+        status["status"] = "running"
+        status["started_at"] = time.time()
+        try:
+            status["phase"] = "partitioning"
+            chains = self._chains()
+            status["assets_total"] = len(chains)
+            chain_chunk_size = max(1, self.chunk_size // 10)
+
+            # Spawned rather than forked: the server forking here would copy
+            # a process whose ingest, commit and logging threads may hold locks
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as pool:
+                status["phase"] = "checking"
+                hash_futures = [pool.submit(_hash_chunk, chunk) for chunk in _chunks(self.nodes, self.chunk_size)]
+                chain_futures = {pool.submit(_chain_chunk, chunk) for chunk in _chunks(chains, chain_chunk_size)}
+
+                self._check_references()
+
+                for future in as_completed(hash_futures + list(chain_futures)):
+                    checked, errors = future.result()
+                    if future in chain_futures:
+                        status["assets_checked"] += checked
+                        self._report("chain_errors", errors)
+                    else:
+                        status["nodes_checked"] += checked
+                        status["hash_mismatch_count"] += len(errors)
+                        self._report("hash_mismatches", errors)
+
+            ok = (not status["hash_mismatch_count"] and not status["reference_errors"]
+                  and not status["chain_errors"] and status["tips_ok"])
+            status["status"] = "verified" if ok else "failed"
+            logger.info(f"Parallel audit finished: {status['nodes_checked']} nodes, "
+                        f"{status['assets_checked']} assets, status {status['status']}")
+        except Exception as e:
+            status["status"] = "error"
+            status["error"] = str(e)
+            logger.error(f"Parallel audit error: {str(e)}", exc_info=True)
+        finally:
+            status["phase"] = None
+            status["finished_at"] = time.time()
+        return status
+
+    def start(self) -> Dict[str, Any]:
+        threading.Thread(target=self.run, name="dag-audit", daemon=True).start()
+        return self.status
+
+def load_nodes(backend: str, storage_path: str) -> Tuple[List[Node], Set[str]]:
+    storage = create_storage(backend, storage_path)
+    # Every hash is recomputed by the audit itself
+    storage.trusted_load = True
+    try:
+        node_map, tips, tail = storage.load()
+        nodes = list(node_map.values())
+        seen = {node.node_id for node in nodes}
+        tips = set(tips)
+        for node in tail:
+            if node.node_id in seen:
+                continue
+            seen.add(node.node_id)
+            nodes.append(node)
+            tips.difference_update(node.references)
+            tips.add(node.node_id)
+        return nodes, tips
+    finally:
+        storage.close()
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Run a full parallel integrity audit of a DAG store')
+    parser.add_argument('--storage', type=str, default="blockchain_dag.json", help='Path to storage file')
+    parser.add_argument('--backend', type=str, default="json", choices=sorted(BACKENDS), help='Storage engine for the DAG')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='Nodes per worker task')
+    args = parser.parse_args()
+
+    nodes, tips = load_nodes(args.backend, args.storage)
+    result = ParallelAudit(nodes, tips, workers=args.workers, chunk_size=args.chunk_size).run()
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result["status"] == "verified" else 1)
@@ -1,120 +1,207 @@
+import os
+import sys
 import json
-import hashlib
 import time
-import uuid
-from typing import Dict, List, Optional, Tuple, Set, Any
-import os
-import random
+import atexit
+import signal
+import queue
+from functools import partial
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple, Set, Any, Union
 import logging
+import bisect
 import argparse
-from flask import Flask, request, jsonify
+import threading
+from collections import Counter, OrderedDict, deque
+from flask import Flask, Response, request, jsonify, make_response
+from node import Node
+from audit import ParallelAudit
+from rwlock import ReadWriteLock
+from tips import TipSelector
+from merkle import MerkleDigest, BUCKET_COUNT, leaf_value, fold, to_hex
+from storage import create_storage, BACKENDS, GroupCommitter, DURABILITY_POLICIES, STORAGE_APPEND_SECONDS, IndexEntry
+from metrics import REGISTRY, timed, instrument_app
+from logging_config import configure_logging, LOG_FORMATS
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('inlock_api')
 
-class Node:
-    VALID_ACTIONS = {"register", "transfer"}
-
-    def __init__(
-        self,
-        asset_id: str,
-        action: str,
-        user_id: str,
-        timestamp: float = None,
-        references: List[str] = None,
-        signature: str = None,
-        node_id: str = None,
-        data: Dict[str, Any] = None
-    ):
-        if not asset_id:
-            raise ValueError("Asset ID cannot be empty")
-        if action not in self.VALID_ACTIONS:
-            raise ValueError(f"Invalid action: {action}. Must be one of {self.VALID_ACTIONS}")
-        if not user_id:
-            raise ValueError("User ID cannot be empty")
-
-        self.asset_id = asset_id
-        self.action = action
-        self.user_id = user_id
-        self.timestamp = timestamp if timestamp is not None else time.time()
-        self.references = references if references is not None else []
-        self.data = data if data is not None else {}
-        self.signature = signature if signature is not None else self._generate_signature()
-        self.node_id = node_id if node_id is not None else str(uuid.uuid4())
-        self.hash = self._calculate_hash()
-
-    def _generate_signature(self) -> str:
-        signature_base = f"{self.user_id}:{self.timestamp}:{random.randint(1, 1000000)}"
-        return hashlib.sha256(signature_base.encode()).hexdigest()
-
-    def _calculate_hash(self) -> str:
-        content = (
-            f"{self.asset_id}:{self.action}:{self.user_id}:"
-            f"{self.timestamp}:{':'.join(self.references)}:"
-            f"{self.signature}:{json.dumps(self.data, sort_keys=True)}"
-        )
-        return hashlib.sha256(content.encode()).hexdigest()
+DAG_OPERATION_SECONDS = REGISTRY.histogram(
+    "dag_operation_duration_seconds", "Latency of DAG operations, lock waits included", ("operation",)
+)
+
+class DAGStats:
+    HOURLY_BUCKETS = 48
+    TIP_SAMPLES = 288
+
+    def __init__(self):
+        self.total_nodes = 0
+        self.action_counts: Dict[str, int] = {action: 0 for action in sorted(Node.VALID_ACTIONS)}
+        self.user_counts: Counter = Counter()
+        # hour bucket (epoch seconds) -> nodes written with a timestamp in that hour
+        self.hourly_writes: Dict[int, int] = {}
+        # (minute bucket, tip count) samples, one per minute with writes
+        self.tip_history: deque = deque(maxlen=self.TIP_SAMPLES)
+
+    def record_node(self, node: Node):
+        self.total_nodes += 1
+        self.action_counts[node.action] = self.action_counts.get(node.action, 0) + 1
+        self.user_counts[node.user_id] += 1
+
+        hour = int(node.timestamp // 3600) * 3600
+        self.hourly_writes[hour] = self.hourly_writes.get(hour, 0) + 1
+        if len(self.hourly_writes) > self.HOURLY_BUCKETS:
+            del self.hourly_writes[min(self.hourly_writes)]
+
+    def record_tips(self, tip_count: int, now: float = None):
+        minute = int((now if now is not None else time.time()) // 60) * 60
+        if self.tip_history and self.tip_history[-1][0] == minute:
+            self.tip_history[-1] = (minute, tip_count)
+        else:
+            self.tip_history.append((minute, tip_count))
 
-    def to_dict(self) -> Dict:
+    def to_dict(self, total_tips: int, unique_assets: int) -> Dict[str, Any]:
         return {
-            "node_id": self.node_id,
-            "asset_id": self.asset_id,
-            "action": self.action,
-            "user_id": self.user_id,
-            "timestamp": self.timestamp,
-            "references": self.references,
-            "signature": self.signature,
-            "hash": self.hash,
-            "data": self.data
+            "total_nodes": self.total_nodes,
+            "total_tips": total_tips,
+            "unique_assets": unique_assets,
+            "unique_users": len(self.user_counts),
+            "action_counts": dict(self.action_counts),
+            "hourly_writes": [
+                {"hour": hour, "count": count}
+                for hour, count in sorted(self.hourly_writes.items())
+            ],
+            "tip_history": [
+                {"timestamp": minute, "tips": tips}
+                for minute, tips in list(self.tip_history)
+            ]
         }
 
-    @classmethod
-    def from_dict(cls, data: Dict) -> 'Node':
-        return cls(
-            asset_id=data["asset_id"],
-            action=data["action"],
-            user_id=data["user_id"],
-            timestamp=data["timestamp"],
-            references=data["references"],
-            signature=data["signature"],
-            node_id=data["node_id"],
-            data=data.get("data", {})
-        )
+HISTORY_CACHE_SIZE = 10000
 
 class DAG:
-    def __init__(self, storage_path: str = "blockchain_dag.json"):
+    def __init__(
+        self,
+        storage_path: str = "blockchain_dag.json",
+        backend: str = "json",
+        durability: str = "sync-per-write",
+        commit_window_ms: float = 5.0,
+        trusted_load: bool = False
+    ):
+        if durability not in DURABILITY_POLICIES:
+            raise ValueError(f"Invalid durability policy: {durability}. Must be one of {set(DURABILITY_POLICIES)}")
+
         self.nodes: Dict[str, Node] = {}
         self.tips: Set[str] = set()
+        self.tip_selector = TipSelector()
+        # asset_id -> [(timestamp, node_id)] kept in timestamp order
+        self.asset_index: Dict[str, List[Tuple[float, str]]] = {}
+        # [(timestamp, node_id)] over the whole DAG, in timestamp order
+        self.time_index: List[Tuple[float, str]] = []
+        # node_id -> ids of the nodes that reference it; tips have no entry
+        self.children: Dict[str, List[str]] = {}
+        # Materialized ownership: asset_id -> current owner, owner -> asset_ids
+        self.current_owner: Dict[str, str] = {}
+        self.owner_assets: Dict[str, Set[str]] = {}
+        self.registered_assets: Set[str] = set()
+        self.stats = DAGStats()
+        self.merkle = MerkleDigest()
+        # asset_id -> (history length, encoded ownership history), LRU order
+        self._history_cache: 'OrderedDict[str, Tuple[int, bytes]]' = OrderedDict()
+        self._history_cache_lock = threading.Lock()
         self.storage_path = storage_path
+        self.storage = create_storage(backend, storage_path)
+        self.storage.trusted_load = trusted_load
+        self.durability = durability
+
+        # Queries share the read side; add_node and index mutation take the
+        # write side. Checkpoints are serialized separately.
+        self._lock = ReadWriteLock()
+        self._checkpoint_lock = threading.Lock()
+        self._records_since_checkpoint = 0
+        self._checkpointer = None
+        self.hash_verification: Optional[Dict[str, Any]] = None
+        self.audit: Optional[ParallelAudit] = None
+        # Held from the running check until the new audit is started
+        self._audit_lock = threading.Lock()
+        # Last time_index entry covered by a successful integrity pass, plus
+        # nodes that arrived since with a timestamp behind it
+        self.verified_watermark: Optional[Tuple[float, str]] = None
+        self.verified_count = 0
+        self._unverified_backfill: Set[str] = set()
+        self.watermark_path = f"{self.storage.storage_path}.verified"
+        self.load_stats: Dict[str, Any] = {
+            "load_seconds": 0.0,
+            "snapshot_nodes": 0,
+            "replayed_records": 0,
+            "skipped_records": 0
+        }
 
-        self._write_lock = False
-
-        if os.path.exists(storage_path):
-            try:
-                self.load()
+        # Lazy backends hand back their own node map, so load even when the
+        # store is still empty
+        try:
+            self.load()
+            if self.nodes:
                 logger.info(f"Blockchain loaded from {storage_path} with {len(self.nodes)} nodes")
-            except Exception as e:
-                logger.error(f"Failed to load blockchain from {storage_path}: {str(e)}", exc_info=True)
-                self.nodes = {}
-                self.tips = set()
+        except Exception as e:
+            logger.error(f"Failed to load blockchain from {storage_path}: {str(e)}", exc_info=True)
+            self.nodes = {}
+            self.tips = set()
+            self.tip_selector = TipSelector()
+            self.asset_index = {}
+            self.time_index = []
+            self.children = {}
+            self.current_owner = {}
+            self.owner_assets = {}
+            self.registered_assets = set()
+            self.stats = DAGStats()
+            self.merkle = MerkleDigest()
+
+        self._committer = None
+        if durability != "sync-per-write":
+            self._committer = GroupCommitter(self.storage, commit_window_ms, on_failure=self._discard_uncommitted)
+        self._ingest: Optional[queue.Queue] = None
 
     def add_node(self, node: Node) -> Tuple[bool, str]:
-        try:
-            valid, message = self._validate_node(node)
-            if not valid:
-                logger.warning(f"Node validation failed: {message}")
-                return False, message
-
-            self.nodes[node.node_id] = node
-
-            for ref in node.references:
-                if ref in self.tips:
-                    self.tips.remove(ref)
-            self.tips.add(node.node_id)
+        return self._add_built(lambda: node)
 
-            logger.info(f"Added node: ID={node.node_id}, Action={node.action}, Asset={node.asset_id}, User={node.user_id}")
-
-            self.save()
+    # Timed here so writes arriving through ingest() without a pipeline count too
+    @timed(DAG_OPERATION_SECONDS, operation="add_node")
+    def _add_built(self, build: Callable[[], Node]) -> Tuple[bool, str]:
+        try:
+            with self._lock.write():
+                # Built under the write lock, so the references it picks are
+                # still tips when it is applied
+                node = build()
+                valid, message = self._validate_node(node)
+                if not valid:
+                    logger.warning("Node validation failed: %s", message)
+                    return False, message
+
+                if self._committer is None:
+                    # Applied first, so a node _apply_node rejects is never
+                    # persisted
+                    self._apply_node(node)
+                    try:
+                        with STORAGE_APPEND_SECONDS.time(backend=self.storage.name):
+                            self.storage.append(node)
+                    except Exception:
+                        # Nothing reached the store; rebuild memory from
+                        # storage so the two agree again
+                        self.load()
+                        raise
+                    commit = None
+                else:
+                    # Validated and applied in arrival order; persisted by the
+                    # committer together with the rest of its window
+                    self._apply_node(node)
+                    commit = self._committer.submit(node)
+                self._records_since_checkpoint += 1
+
+            if commit is not None and self.durability != "async":
+                commit.result()
+
+            logger.info("Added node: ID=%s, Action=%s, Asset=%s, User=%s", node.node_id, node.action, node.asset_id, node.user_id)
 
             return True, node.node_id
 
@@ -123,6 +210,322 @@ class DAG:
             logger.error(error_msg, exc_info=True)
             return False, error_msg
 
+    def start_ingest(self, queue_size: int = 10000, max_batch: int = 500):
+        """Route writes through a single writer thread fed by a bounded queue.
+
+        The writer chooses references, validates and applies a whole batch
+        under one write lock, then hands it to the group committer, so
+        validation of the next batch overlaps persistence of this one.
+        """
+        if self._ingest is not None:
+            return
+
+        if self._committer is None:
+            # Persistence becomes its own stage; writes are still acknowledged
+            # only once they are on disk
+            self._committer = GroupCommitter(self.storage, 0.0, on_failure=self._discard_uncommitted)
+
+        self._ingest = queue.Queue(maxsize=queue_size)
+        threading.Thread(target=self._ingest_loop, args=(max_batch,), name="dag-ingest", daemon=True).start()
+        logger.info(f"Ingest pipeline started with a queue of {queue_size} writes")
+
+    @timed(DAG_OPERATION_SECONDS, operation="ingest")
+    def ingest(self, build: Callable[[], Node], timeout: float = 5.0) -> Tuple[bool, str]:
+        # build runs on the writer thread so references are chosen against
+        # the tips at the moment the node is applied
+        if self._ingest is None:
+            return self._add_built(build)
+
+        future = Future()
+        try:
+            self._ingest.put((build, future), timeout=timeout)
+        except queue.Full:
+            logger.warning("Ingest queue is full, rejecting write")
+            return False, "Ingest queue is full, try again later"
+        return future.result()
+
+    def _ingest_loop(self, max_batch: int):
+        while True:
+            batch = [self._ingest.get()]
+            while len(batch) < max_batch:
+                try:
+                    batch.append(self._ingest.get_nowait())
+                except queue.Empty:
+                    break
+
+            accepted = []
+            with self._lock.write():
+                for build, future in batch:
+                    try:
+                        node = build()
+                        valid, message = self._validate_node(node)
+                        if not valid:
+                            logger.warning("Node validation failed: %s", message)
+                            future.set_result((False, message))
+                            continue
+
+                        self._apply_node(node)
+                        self._records_since_checkpoint += 1
+                        accepted.append((node, future, self._committer.submit(node)))
+                    except Exception as e:
+                        error_msg = f"Error adding node: {str(e)}"
+                        logger.error(error_msg, exc_info=True)
+                        future.set_result((False, error_msg))
+
+            for node, future, commit in accepted:
+                logger.info("Added node: ID=%s, Action=%s, Asset=%s, User=%s", node.node_id, node.action, node.asset_id, node.user_id)
+                if self.durability == "async":
+                    future.set_result((True, node.node_id))
+                else:
+                    commit.add_done_callback(partial(self._resolve_commit, node, future))
+
+    @timed(DAG_OPERATION_SECONDS, operation="add_nodes")
+    def add_nodes(self, builders: List[Callable[[], Node]]) -> List[Tuple[bool, str]]:
+        """Validate and apply nodes in order, persisting the accepted ones together.
+
+        Each builder runs after the previous node was applied, so later items
+        may depend on earlier ones (e.g. register then transfer). Invalid items
+        fail on their own without affecting the rest of the batch.
+        """
+        results: List[Tuple[bool, str]] = []
+        accepted = []
+        with self._lock.write():
+            for build in builders:
+                try:
+                    node = build()
+                    valid, message = self._validate_node(node)
+                except Exception as e:
+                    results.append((False, f"Error adding node: {str(e)}"))
+                    continue
+                if not valid:
+                    logger.warning("Node validation failed: %s", message)
+                    results.append((False, message))
+                    continue
+
+                try:
+                    self._apply_node(node)
+                except Exception as e:
+                    # Nothing of the batch is persisted yet; roll back what
+                    # was applied so far by rebuilding memory from storage
+                    logger.error(f"Failed to apply node {node.node_id}: {str(e)}", exc_info=True)
+                    if self._committer is not None:
+                        # Writes already handed to the committer must not be
+                        # dropped from memory by the reload
+                        self._committer.wait_idle(10.0)
+                    self.load()
+                    error_msg = f"Error adding node: {str(e)}"
+                    for position, _ in accepted:
+                        results[position] = (False, error_msg)
+                    results.append((False, error_msg))
+                    results.extend((False, "Batch aborted") for _ in builders[len(results):])
+                    return results
+
+                accepted.append((len(results), node))
+                results.append((True, node.node_id))
+
+            if not accepted:
+                return results
+
+            nodes = [node for _, node in accepted]
+            self._records_since_checkpoint += len(nodes)
+            if self._committer is None:
+                try:
+                    with STORAGE_APPEND_SECONDS.time(backend=self.storage.name):
+                        self.storage.append_many(nodes)
+                    commit = None
+                except Exception as e:
+                    # Nothing of the batch reached the store; rebuild memory
+                    # from storage so the two agree again
+                    logger.error(f"Failed to persist batch of {len(nodes)} nodes: {str(e)}", exc_info=True)
+                    self.load()
+                    for position, _ in accepted:
+                        results[position] = (False, f"Error adding node: {str(e)}")
+                    return results
+            else:
+                # One commit unit, so the batch is persisted by a single append
+                commit = self._committer.submit_many(nodes)
+
+        if commit is not None and self.durability != "async":
+            error = commit.exception()
+            if error is not None:
+                for position, _ in accepted:
+                    results[position] = (False, f"Error adding node: {str(error)}")
+
+        logger.info("Added batch of %d nodes (%d rejected)", len(accepted), len(builders) - len(accepted))
+        return results
+
+    def _discard_uncommitted(self, error: Exception):
+        # Nodes are applied before the committer persists them, so a failed
+        # batch, and any writes queued behind it that may build on it, are
+        # visible without being durable. Fail the queued writes and rebuild
+        # memory from the store while no writer can observe the gap.
+        with self._lock.write():
+            abandoned = self._committer.drain()
+            self.load()
+            for future in abandoned:
+                future.set_exception(error)
+        logger.warning(f"Discarded {len(abandoned)} queued writes and reloaded {len(self.nodes)} nodes after a failed commit")
+
+    def shutdown(self, timeout: float = 10.0):
+        """Wait for writes still queued for a group commit to reach the store."""
+        if self._committer is not None:
+            self._committer.flush(timeout)
+
+    def _resolve_commit(self, node: Node, future: Future, commit: Future):
+        error = commit.exception()
+        if error is not None:
+            future.set_result((False, f"Error adding node: {str(error)}"))
+        else:
+            future.set_result((True, node.node_id))
+
+    def _apply_node(self, node: Node):
+        # Everything that can raise runs before any state changes, so a node
+        # is never left half-applied
+        leaf = leaf_value(node)
+
+        self.nodes[node.node_id] = node
+        self._index_node(node, leaf)
+
+        if self.verified_watermark is not None and node.timestamp <= self.verified_watermark[0]:
+            self._unverified_backfill.add(node.node_id)
+
+        for ref in node.references:
+            if ref in self.tips:
+                self.tips.remove(ref)
+                self.tip_selector.remove(ref)
+        self.tips.add(node.node_id)
+        self.tip_selector.add(node.node_id, node.timestamp)
+        self.stats.record_tips(len(self.tips))
+
+    def _index_node(self, node: Union[Node, IndexEntry], leaf: int = None):
+        self.stats.record_node(node)
+        self.merkle.add(node, leaf)
+
+        if node.action == "register":
+            self.registered_assets.add(node.asset_id)
+
+        for ref in node.references:
+            self.children.setdefault(ref, []).append(node.node_id)
+
+        entry = (node.timestamp, node.node_id)
+        self._insert_entry(self.time_index, entry)
+
+        entries = self.asset_index.setdefault(node.asset_id, [])
+        in_order = not entries or entries[-1][0] <= node.timestamp
+        # Equal timestamps keep arrival order, like the stable sort this replaces
+        self._insert_entry(entries, entry)
+        if in_order:
+            owner = self._owner_after(node)
+            if owner is None:
+                return
+        else:
+            owner = self._owner_from_history(node.asset_id)
+
+        self._set_owner(node.asset_id, owner)
+
+    def _insert_entry(self, entries: List[Tuple[float, str]], entry: Tuple[float, str]):
+        if not entries or entries[-1][0] <= entry[0]:
+            entries.append(entry)
+        else:
+            bisect.insort_right(entries, entry, key=lambda e: e[0])
+
+    def _slice_entries(
+        self,
+        entries: List[Tuple[float, str]],
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[Tuple[float, str]] = None
+    ) -> Tuple[List[str], Optional[Tuple[float, str]]]:
+        """Return node ids with since <= timestamp <= until, starting after cursor.
+
+        The returned cursor is the last entry of the page when limit cut it short.
+        """
+        with self._lock.read():
+            start = 0
+            if since is not None:
+                start = bisect.bisect_left(entries, since, key=lambda e: e[0])
+
+            if cursor is not None:
+                cursor_ts, cursor_id = cursor
+                first = bisect.bisect_left(entries, cursor_ts, key=lambda e: e[0])
+                after = bisect.bisect_right(entries, cursor_ts, key=lambda e: e[0])
+                # Equal timestamps are kept in arrival order, so resume just past the cursor node
+                for i in range(first, after):
+                    if entries[i][1] == cursor_id:
+                        after = i + 1
+                        break
+                start = max(start, after)
+
+            stop = len(entries)
+            if until is not None:
+                stop = bisect.bisect_right(entries, until, key=lambda e: e[0])
+
+            next_cursor = None
+            if limit is not None and stop - start > limit:
+                stop = start + limit
+                next_cursor = entries[stop - 1]
+
+            return [node_id for _, node_id in entries[start:stop]], next_cursor
+
+    def _owner_after(self, node: Union[Node, IndexEntry]) -> Optional[str]:
+        if node.action == "register":
+            return node.user_id
+        if node.action == "transfer" and "recipient_id" in node.data:
+            return node.data["recipient_id"]
+        return None
+
+    def _owner_from_history(self, asset_id: str) -> Optional[str]:
+        for _, node_id in reversed(self.asset_index.get(asset_id, ())):
+            owner = self._owner_after(self.nodes[node_id])
+            if owner is not None:
+                return owner
+        return None
+
+    def _set_owner(self, asset_id: str, owner: Optional[str]):
+        previous = self.current_owner.get(asset_id)
+        if previous == owner:
+            return
+
+        if previous is not None:
+            owned = self.owner_assets.get(previous)
+            if owned is not None:
+                owned.discard(asset_id)
+                if not owned:
+                    del self.owner_assets[previous]
+
+        if owner is None:
+            self.current_owner.pop(asset_id, None)
+        else:
+            self.current_owner[asset_id] = owner
+            self.owner_assets.setdefault(owner, set()).add(asset_id)
+
+    def _rebuild_indexes(self):
+        self.asset_index = {}
+        self.time_index = []
+        self.children = {}
+        self.current_owner = {}
+        self.owner_assets = {}
+        self.registered_assets = set()
+        self.stats = DAGStats()
+        self.merkle = MerkleDigest()
+        with self._history_cache_lock:
+            self._history_cache.clear()
+        # Lazy backends index from stored fields, so no node is decoded
+        # (or rehashed) at startup until something reads it
+        entries = self.storage.index_entries()
+        for node in entries if entries is not None else self.nodes.values():
+            self._index_node(node)
+        self.stats.record_tips(len(self.tips))
+        self._reset_tip_selector()
+
+    def _reset_tip_selector(self):
+        tips = {}
+        for node_id in self.tips:
+            node = self.nodes.get(node_id)
+            tips[node_id] = node.timestamp if node is not None else time.time()
+        self.tip_selector.reset(tips)
+
     def _validate_node(self, node: Node) -> Tuple[bool, str]:
         if node.node_id in self.nodes:
             return False, f"Node with ID {node.node_id} already exists"
@@ -134,22 +537,22 @@ class DAG:
         if len(node.references) > 2:
             return False, "A node cannot have more than 2 references"
 
+        if not isinstance(node.data, dict):
+            return False, "Node data must be a JSON object"
+
         if node.action == "register":
-            for existing_node in self.nodes.values():
-                if existing_node.asset_id == node.asset_id and existing_node.action == "register":
-                    return False, f"Asset {node.asset_id} is already registered"
+            if self.is_asset_registered(node.asset_id):
+                return False, f"Asset {node.asset_id} is already registered"
 
             if not node.data:
                 logger.warning(f"Asset {node.asset_id} registered without metadata")
 
         elif node.action == "transfer":
-            owner_history = self.get_asset_ownership_history(node.asset_id)
+            current_owner = self.get_current_owner(node.asset_id)
 
-            if not owner_history:
+            if current_owner is None:
                 return False, f"Asset {node.asset_id} is not registered"
 
-            current_owner = owner_history[-1]["user_id"]
-
             if current_owner != node.user_id:
                 return False, f"Transfer requested by {node.user_id}, but asset is owned by {current_owner}"
 
@@ -169,18 +572,173 @@ class DAG:
         return self.nodes.get(node_id)
 
     def get_asset_nodes(self, asset_id: str) -> List[Node]:
-        return [node for node in self.nodes.values() if node.asset_id == asset_id]
+        with self._lock.read():
+            return [self.nodes[node_id] for _, node_id in self.asset_index.get(asset_id, ())]
+
+    @timed(DAG_OPERATION_SECONDS, operation="query_asset_nodes")
+    def query_asset_nodes(
+        self,
+        asset_id: str,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[Tuple[float, str]] = None
+    ) -> Tuple[List[Node], Optional[Tuple[float, str]]]:
+        node_ids, next_cursor = self._slice_entries(self.asset_index.get(asset_id, []), since, until, limit, cursor)
+        return [self.nodes[node_id] for node_id in node_ids], next_cursor
+
+    @timed(DAG_OPERATION_SECONDS, operation="query_nodes")
+    def query_nodes(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[Tuple[float, str]] = None
+    ) -> Tuple[List[Node], Optional[Tuple[float, str]]]:
+        node_ids, next_cursor = self._slice_entries(self.time_index, since, until, limit, cursor)
+        return [self.nodes[node_id] for node_id in node_ids], next_cursor
+
+    def get_merkle_root(self) -> Dict[str, Any]:
+        with self._lock.read():
+            return self.merkle.to_dict()
+
+    def get_merkle_buckets(self) -> Dict[str, Any]:
+        with self._lock.read():
+            return {"root": self.merkle.root(), "buckets": self.merkle.bucket_digests()}
+
+    def get_merkle_bucket(self, bucket: int) -> Dict[str, Any]:
+        with self._lock.read():
+            digest = to_hex(self.merkle.buckets[bucket])
+            asset_ids = sorted(self.merkle.assets[bucket])
+            assets = {
+                asset_id: to_hex(fold(leaf_value(node) for node in self.get_asset_nodes(asset_id)))
+                for asset_id in asset_ids
+            }
+        return {"bucket": bucket, "digest": digest, "assets": assets}
+
+    def _traverse(self, node_id: str, edges: Callable[[str], List[str]], max_depth: int, limit: int) -> Dict[str, Any]:
+        # Breadth-first, so each node is reported at its shortest distance
+        with self._lock.read():
+            visited = {node_id}
+            frontier = [node_id]
+            found = []
+            depth = 0
+            truncated = False
+            while frontier and depth < max_depth and not truncated:
+                depth += 1
+                next_frontier = []
+                for current in frontier:
+                    for neighbour in edges(current):
+                        if neighbour in visited:
+                            continue
+                        if len(found) >= limit:
+                            truncated = True
+                            break
+                        visited.add(neighbour)
+                        found.append({"node_id": neighbour, "depth": depth})
+                        next_frontier.append(neighbour)
+                    if truncated:
+                        break
+                frontier = next_frontier
+
+            return {
+                "node_id": node_id,
+                "nodes": found,
+                "count": len(found),
+                "depth": found[-1]["depth"] if found else 0,
+                # More unvisited nodes lie beyond max_depth or limit
+                "truncated": truncated or any(
+                    neighbour not in visited for current in frontier for neighbour in edges(current)
+                )
+            }
+
+    @timed(DAG_OPERATION_SECONDS, operation="get_ancestors")
+    def get_ancestors(self, node_id: str, max_depth: int = 10, limit: int = 10000) -> Optional[Dict[str, Any]]:
+        if node_id not in self.nodes:
+            return None
+        return self._traverse(node_id, lambda current: getattr(self.nodes.get(current), "references", ()), max_depth, limit)
+
+    @timed(DAG_OPERATION_SECONDS, operation="get_descendants")
+    def get_descendants(self, node_id: str, max_depth: int = 10, limit: int = 10000) -> Optional[Dict[str, Any]]:
+        """Nodes approving node_id directly or indirectly.
+
+        count is the approval weight seen within the bounds (the cumulative
+        weight minus the node itself) and depth the deepest confirmation level.
+        """
+        if node_id not in self.nodes:
+            return None
+        return self._traverse(node_id, lambda current: self.children.get(current, ()), max_depth, limit)
 
     def get_user_nodes(self, user_id: str) -> List[Node]:
-        return [node for node in self.nodes.values() if node.user_id == user_id]
+        indexed = self.storage.query_user_nodes(user_id)
+        if indexed is not None:
+            return indexed
+        with self._lock.read():
+            return [node for node in self.nodes.values() if node.user_id == user_id]
 
+    @timed(DAG_OPERATION_SECONDS, operation="get_asset_ownership_history")
     def get_asset_ownership_history(self, asset_id: str) -> List[Dict]:
-        asset_nodes = self.get_asset_nodes(asset_id)
+        return self._ownership_entries(self.get_asset_nodes(asset_id))
+
+    def get_asset_version(self, asset_id: str) -> int:
+        # Every node added for the asset grows its index entry by one, so
+        # the entry length doubles as a version counter bumped by add_node
+        return len(self.asset_index.get(asset_id, ()))
+
+    def get_asset_etag(self, asset_id: str) -> str:
+        """Version tag for everything served about asset_id.
+
+        The newest node id is included so a replica that lost and re-wrote
+        its tail under async durability never reuses a tag for new content.
+        """
+        with self._lock.read():
+            entries = self.asset_index.get(asset_id)
+            if not entries:
+                return "0"
+            return f"{len(entries)}-{entries[-1][1]}"
+
+    @timed(DAG_OPERATION_SECONDS, operation="get_encoded_ownership_history")
+    def get_encoded_ownership_history(self, asset_id: str) -> bytes:
+        """Ownership history of asset_id as a JSON array, cached per asset.
+
+        The history only ever grows, so its length identifies the cached
+        encoding and a new node for the asset simply makes it stale.
+        """
+        with self._lock.read():
+            version = self.get_asset_version(asset_id)
+            with self._history_cache_lock:
+                cached = self._history_cache.get(asset_id)
+                if cached is not None and cached[0] == version:
+                    self._history_cache.move_to_end(asset_id)
+                    return cached[1]
+
+            encoded = json.dumps(
+                self._ownership_entries(self.get_asset_nodes(asset_id)),
+                sort_keys=True, separators=(",", ":")
+            ).encode()
+            with self._history_cache_lock:
+                self._history_cache[asset_id] = (version, encoded)
+                self._history_cache.move_to_end(asset_id)
+                while len(self._history_cache) > HISTORY_CACHE_SIZE:
+                    self._history_cache.popitem(last=False)
+            return encoded
+
+    @timed(DAG_OPERATION_SECONDS, operation="get_asset_ownership_page")
+    def get_asset_ownership_page(
+        self,
+        asset_id: str,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[Tuple[float, str]] = None
+    ) -> Tuple[List[Dict], Optional[Tuple[float, str]]]:
+        asset_nodes, next_cursor = self.query_asset_nodes(asset_id, since, until, limit, cursor)
+        return self._ownership_entries(asset_nodes), next_cursor
+
+    def _ownership_entries(self, asset_nodes: List[Node]) -> List[Dict]:
         if not asset_nodes:
             return []
 
-        asset_nodes.sort(key=lambda x: x.timestamp)
-
         ownership_history = []
 
         for node in asset_nodes:
@@ -202,12 +760,16 @@ class DAG:
 
         return ownership_history
 
+    def is_asset_registered(self, asset_id: str) -> bool:
+        return asset_id in self.registered_assets
+
+    def get_current_owner(self, asset_id: str) -> Optional[str]:
+        return self.current_owner.get(asset_id)
+
     def get_asset_staking_status(self, asset_id: str) -> Dict:
-        ownership_history = self.get_asset_ownership_history(asset_id)
-        if not ownership_history:
+        current_owner = self.get_current_owner(asset_id)
+        if current_owner is None:
             return {"is_staked": False, "error": "Asset not found"}
-            
-        current_owner = ownership_history[-1]["user_id"]
         
         return {
             "is_staked": False,
@@ -215,118 +777,254 @@ class DAG:
         }
 
     def get_user_assets(self, user_id: str) -> List[str]:
-        all_assets = set()
-        owned_assets = set()
-
-        for node in self.nodes.values():
-            all_assets.add(node.asset_id)
-
-        for asset_id in all_assets:
-            ownership_history = self.get_asset_ownership_history(asset_id)
-            if ownership_history and ownership_history[-1]["user_id"] == user_id:
-                owned_assets.add(asset_id)
-
-        return list(owned_assets)
+        with self._lock.read():
+            return list(self.owner_assets.get(user_id, ()))
 
     def get_user_staking_balance(self, user_id: str) -> int:
         return 0
 
+    @timed(DAG_OPERATION_SECONDS, operation="save")
     def save(self):
-        if self._write_lock:
+        self.checkpoint()
+
+    @timed(DAG_OPERATION_SECONDS, operation="checkpoint")
+    def checkpoint(self) -> bool:
+        if not self._checkpoint_lock.acquire(blocking=False):
             logger.warning("Blockchain save attempted while another save was in progress")
-            return
+            return False
 
         try:
-            self._write_lock = True
+            # Sealing only has to exclude writers; queries keep running
+            with self._lock.read():
+                # Applied nodes may still be waiting for their group commit,
+                # and one that then fails must not survive in the snapshot
+                if self._committer is not None and not self._committer.wait_idle(10.0):
+                    logger.warning("Checkpoint skipped: group commit did not settle")
+                    return False
+                sealed = self.storage.seal(self.nodes, self.tips)
+                self._records_since_checkpoint = 0
 
-            if os.path.exists(self.storage_path):
-                backup_path = f"{self.storage_path}.bak"
-                try:
-                    import shutil
-                    shutil.copy2(self.storage_path, backup_path)
-                except Exception as e:
-                    logger.error(f"Failed to create backup: {str(e)}")
-
-            data = {
-                "nodes": {node_id: node.to_dict() for node_id, node in self.nodes.items()},
-                "tips": list(self.tips)
-            }
-
-            temp_path = f"{self.storage_path}.tmp"
-            with open(temp_path, "w") as f:
-                json.dump(data, f, indent=2)
+            checkpoint = self.storage.write_checkpoint(sealed)
 
-            os.replace(temp_path, self.storage_path)
-
-            logger.info(f"Blockchain saved with {len(self.nodes)} nodes")
+            logger.info(f"Blockchain saved with {checkpoint['node_count']} nodes")
+            return True
 
         except Exception as e:
             logger.error(f"Error saving blockchain: {str(e)}", exc_info=True)
+            return False
         finally:
-            self._write_lock = False
+            self._checkpoint_lock.release()
 
-    def load(self):
-        try:
-            with open(self.storage_path, "r") as f:
-                data = json.load(f)
+    def start_checkpointer(self, interval: float = 60.0, min_records: int = 1000):
+        if self._checkpointer is not None:
+            return
 
-            self.nodes = {
-                node_id: Node.from_dict(node_data)
-                for node_id, node_data in data["nodes"].items()
-            }
+        def run():
+            elapsed = 0.0
+            while True:
+                time.sleep(1.0)
+                elapsed += 1.0
+                pending = self._records_since_checkpoint
+                if pending >= min_records or (pending and elapsed >= interval):
+                    self.checkpoint()
+                    elapsed = 0.0
+
+        self._checkpointer = threading.Thread(target=run, name="dag-checkpointer", daemon=True)
+        self._checkpointer.start()
+        logger.info(f"Background checkpoints every {interval}s or {min_records} records")
+
+    def start_hash_verifier(self, max_reported: int = 100):
+        # Re-checks stored hashes of nodes that were loaded without rehashing,
+        # while the API is already serving
+        node_ids = list(self.nodes)
+        status = {
+            "status": "running",
+            "checked": 0,
+            "total": len(node_ids),
+            "mismatch_count": 0,
+            "mismatches": [],
+            "started_at": time.time(),
+            "finished_at": None
+        }
+        self.hash_verification = status
 
-            self.tips = set(data["tips"])
+        def run():
+            try:
+                for i, node_id in enumerate(node_ids):
+                    node = self.nodes.get(node_id)
+                    if node is not None and node.hash != node._calculate_hash():
+                        status["mismatch_count"] += 1
+                        if len(status["mismatches"]) < max_reported:
+                            status["mismatches"].append(node_id)
+                        logger.error(f"Stored hash mismatch for node {node_id}")
+                    status["checked"] = i + 1
+                    if i % 1000 == 999:
+                        time.sleep(0)
+
+                status["status"] = "failed" if status["mismatch_count"] else "verified"
+                logger.info(f"Background hash verification finished: {status['checked']} nodes, "
+                            f"{status['mismatch_count']} mismatches")
+            except Exception as e:
+                status["status"] = "error"
+                logger.error(f"Background hash verification error: {str(e)}", exc_info=True)
+            finally:
+                status["finished_at"] = time.time()
 
-            logger.info(f"Loaded {len(self.nodes)} nodes from blockchain storage")
+        threading.Thread(target=run, name="dag-hash-verifier", daemon=True).start()
 
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON error loading blockchain: {str(e)}", exc_info=True)
+    def start_audit(self, workers: int = None) -> Optional[Dict[str, Any]]:
+        # Returns None while a previous audit is still running
+        with self._audit_lock:
+            if self.audit is not None and self.audit.status["status"] in ("pending", "running"):
+                return None
 
-            backup_path = f"{self.storage_path}.bak"
-            if os.path.exists(backup_path):
-                logger.info(f"Attempting to restore from backup {backup_path}")
-                with open(backup_path, "r") as f:
-                    data = json.load(f)
+            with self._lock.read():
+                nodes = list(self.nodes.values())
+                tips = set(self.tips)
+                asset_index = {asset_id: list(entries) for asset_id, entries in self.asset_index.items()}
 
-                self.nodes = {
-                    node_id: Node.from_dict(node_data)
-                    for node_id, node_data in data["nodes"].items()
-                }
-                self.tips = set(data["tips"])
-            else:
-                raise
+            self.audit = ParallelAudit(nodes, tips, asset_index, workers=workers)
+            return self.audit.start()
+
+    @property
+    def last_checkpoint(self) -> Optional[Dict[str, Any]]:
+        return self.storage.last_checkpoint
+
+    @timed(DAG_OPERATION_SECONDS, operation="load")
+    def load(self):
+        started = time.time()
+        try:
+            self.nodes, self.tips, tail = self.storage.load()
+            self._rebuild_indexes()
+            self._load_watermark()
+            self._replay_log(tail)
 
         except Exception as e:
             logger.error(f"Error loading blockchain: {str(e)}", exc_info=True)
             raise
 
+        finally:
+            self.load_stats["load_seconds"] = round(time.time() - started, 6)
+
+    def _replay_log(self, tail: List[Node]):
+        self.load_stats["snapshot_nodes"] = len(self.nodes)
+
+        replayed = 0
+        skipped = 0
+        for node in tail:
+            # A crash between writing a snapshot and removing the sealed
+            # segments leaves records that are already part of the snapshot
+            if node.node_id in self.nodes:
+                skipped += 1
+                continue
+            self._apply_node(node)
+            replayed += 1
+
+        self._records_since_checkpoint = replayed
+        self.load_stats["replayed_records"] = replayed
+        self.load_stats["skipped_records"] = skipped
+
+        if replayed:
+            logger.info(f"Replayed {replayed} nodes from the {self.storage.name} storage log")
+
+    def _load_watermark(self):
+        self.verified_watermark = None
+        self.verified_count = 0
+        self._unverified_backfill = set()
+        if not os.path.exists(self.watermark_path):
+            return
+
+        try:
+            with open(self.watermark_path, "r") as f:
+                data = json.load(f)
+            watermark = (float(data["timestamp"]), data["node_id"])
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable verification watermark {self.watermark_path}: {str(e)}")
+            return
+
+        # A watermark for a node this store does not hold belongs to other data
+        if watermark[1] not in self.nodes:
+            logger.warning(f"Verification watermark node {watermark[1]} not found, next check will be full")
+            return
+
+        self.verified_watermark = watermark
+        self.verified_count = int(data.get("verified_count", 0))
+
+    def _save_watermark(self):
+        timestamp, node_id = self.verified_watermark
+        temp_path = f"{self.watermark_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump({
+                "timestamp": timestamp,
+                "node_id": node_id,
+                "verified_count": self.verified_count,
+                "verified_at": time.time()
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.watermark_path)
+
     def get_tips(self) -> List[Node]:
-        return [self.nodes[node_id] for node_id in self.tips]
+        with self._lock.read():
+            return [self.nodes[node_id] for node_id in self.tips]
 
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock.read():
+            stats = self.stats.to_dict(len(self.tips), len(self.asset_index))
+            stats["tip_metrics"] = self.tip_selector.metrics()
+            return stats
+
+    @timed(DAG_OPERATION_SECONDS, operation="choose_references")
     def choose_references(self) -> List[str]:
-        tips_list = list(self.tips)
+        with self._lock.read():
+            return self.tip_selector.choose(2)
 
-        if len(tips_list) >= 2:
-            return random.sample(tips_list, 2)
+    def get_tip_metrics(self) -> Dict[str, Any]:
+        with self._lock.read():
+            return self.tip_selector.metrics()
 
-        return tips_list
+    @timed(DAG_OPERATION_SECONDS, operation="verify_integrity")
+    def verify_integrity(self, full: bool = False) -> Tuple[bool, str]:
+        """Check references, hashes, ownership chains and tips.
 
-    def verify_integrity(self) -> Tuple[bool, str]:
+        Routine checks only cover nodes added since the last successful pass
+        (the verified watermark); full=True re-audits the whole DAG.
+        """
         try:
+            with self._lock.read():
+                watermark = None if full else self.verified_watermark
+                backfill = set(self._unverified_backfill)
+                last_entry = self.time_index[-1] if self.time_index else None
+                if watermark is None:
+                    node_ids = list(self.nodes)
+                else:
+                    node_ids, _ = self._slice_entries(self.time_index, cursor=watermark)
+                    node_ids = list(backfill.union(node_ids))
+
+            if watermark is not None and not node_ids:
+                return True, "DAG integrity verified (no new nodes since last check)"
+
+            logger.info(f"Verifying {'all' if watermark is None else len(node_ids)} nodes "
+                        f"({'full' if watermark is None else 'incremental'} check)...")
+            new_nodes = [self.nodes[node_id] for node_id in node_ids]
+
             logger.info("Verifying blockchain reference integrity...")
-            for node_id, node in self.nodes.items():
+            for node in new_nodes:
                 for ref in node.references:
                     if ref not in self.nodes:
-                        return False, f"Node {node_id} references non-existent node {ref}"
+                        return False, f"Node {node.node_id} references non-existent node {ref}"
 
             logger.info("Verifying blockchain hash integrity...")
-            for node_id, node in self.nodes.items():
+            for node in new_nodes:
                 expected_hash = node._calculate_hash()
                 if node.hash != expected_hash:
-                    return False, f"Hash mismatch for node {node_id}"
+                    return False, f"Hash mismatch for node {node.node_id}"
 
             logger.info("Verifying asset ownership chains...")
-            asset_ids = set(node.asset_id for node in self.nodes.values())
+            if watermark is None:
+                asset_ids = list(self.asset_index)
+            else:
+                asset_ids = {node.asset_id for node in new_nodes}
             for asset_id in asset_ids:
                 ownership_history = self.get_asset_ownership_history(asset_id)
                 if not ownership_history:
@@ -345,50 +1043,96 @@ class DAG:
                             return False, f"Transfer node {curr['node_id']} has invalid initiator"
 
             logger.info("Verifying DAG tips...")
-            computed_tips = set()
-            referenced_nodes = set()
-
-            for node in self.nodes.values():
-                referenced_nodes.update(node.references)
-
-            for node_id in self.nodes:
-                if node_id not in referenced_nodes:
-                    computed_tips.add(node_id)
-
-            if computed_tips != self.tips:
-                extra_tips = self.tips - computed_tips
-                missing_tips = computed_tips - self.tips
-
-                error_msg = "Tips inconsistency detected. "
-                if extra_tips:
-                    error_msg += f"Extra tips: {extra_tips}. "
-                if missing_tips:
-                    error_msg += f"Missing tips: {missing_tips}."
-
-                logger.warning(f"{error_msg} Auto-fixing...")
-                self.tips = computed_tips
-                self.save()
+            if watermark is None or not self._tips_consistent(new_nodes):
+                self._verify_tips()
+
+            with self._lock.write():
+                if watermark is None:
+                    self.verified_count = len(node_ids)
+                else:
+                    self.verified_count += len(node_ids)
+                self._unverified_backfill -= backfill
+                if last_entry is not None:
+                    self.verified_watermark = last_entry
+                    self._save_watermark()
 
             logger.info("Blockchain integrity verified successfully")
-            return True, "DAG integrity verified"
+            if watermark is None:
+                return True, "DAG integrity verified"
+            return True, f"DAG integrity verified ({len(node_ids)} new nodes checked)"
 
         except Exception as e:
             error_msg = f"Integrity verification error: {str(e)}"
             logger.error(error_msg, exc_info=True)
             return False, error_msg
 
-def register_asset(blockchain: DAG, asset_id: str, user_id: str, asset_data: Dict = None) -> Tuple[bool, str]:
-    references = blockchain.choose_references()
-
-    node = Node(
-        asset_id=asset_id,
-        action="register",
-        user_id=user_id,
-        references=references,
-        data=asset_data or {}
-    )
+    def _tips_consistent(self, new_nodes: List[Node]) -> bool:
+        # Only newer nodes can reference a node, so with everything behind the
+        # watermark already consistent it is enough to look at the new ones
+        with self._lock.read():
+            for node in new_nodes:
+                if any(ref in self.tips for ref in node.references):
+                    return False
+                if (node.node_id in self.tips) == (node.node_id in self.children):
+                    return False
+            return all(tip in self.nodes for tip in self.tips)
+
+    def _verify_tips(self):
+        # Under the write side, so tips cannot move between computing and fixing them
+        with self._lock.write():
+            computed_tips = {node_id for node_id in self.nodes if node_id not in self.children}
+
+            if computed_tips == self.tips:
+                return
+
+            extra_tips = self.tips - computed_tips
+            missing_tips = computed_tips - self.tips
+
+            error_msg = "Tips inconsistency detected. "
+            if extra_tips:
+                error_msg += f"Extra tips: {extra_tips}. "
+            if missing_tips:
+                error_msg += f"Missing tips: {missing_tips}."
+
+            logger.warning(f"{error_msg} Auto-fixing...")
+            self.tips = computed_tips
+            self._reset_tip_selector()
+            self.stats.record_tips(len(self.tips))
+
+        self.save()
+
+MAX_BATCH_SIZE = 5000
+
+def register_builder(blockchain: DAG, asset_id: str, user_id: str, asset_data: Dict = None) -> Callable[[], Node]:
+    def build() -> Node:
+        return Node(
+            asset_id=asset_id,
+            action="register",
+            user_id=user_id,
+            references=blockchain.choose_references(),
+            data=asset_data or {}
+        )
+
+    return build
+
+def transfer_builder(blockchain: DAG, asset_id: str, from_user_id: str, to_user_id: str) -> Callable[[], Node]:
+    def build() -> Node:
+        return Node(
+            asset_id=asset_id,
+            action="transfer",
+            user_id=from_user_id,
+            references=blockchain.choose_references(),
+            data={
+                "recipient_id": to_user_id,
+                "transfer_timestamp": time.time(),
+                "status": "completed"
+            }
+        )
+
+    return build
 
-    return blockchain.add_node(node)
+def register_asset(blockchain: DAG, asset_id: str, user_id: str, asset_data: Dict = None) -> Tuple[bool, str]:
+    return blockchain.ingest(register_builder(blockchain, asset_id, user_id, asset_data))
 
 def transfer_asset(blockchain: DAG, asset_id: str, from_user_id: str, to_user_id: str) -> Tuple[bool, str]:
     if not verify_asset_ownership(blockchain, asset_id, from_user_id):
@@ -397,40 +1141,56 @@ def transfer_asset(blockchain: DAG, asset_id: str, from_user_id: str, to_user_id
     if verify_asset_ownership(blockchain, asset_id, to_user_id):
         return False, f"Asset {asset_id} is already owned by {to_user_id}"
 
-    references = blockchain.choose_references()
-
-    node = Node(
-        asset_id=asset_id,
-        action="transfer",
-        user_id=from_user_id,
-        references=references,
-        data={
-            "recipient_id": to_user_id,
-            "transfer_timestamp": time.time(),
-            "status": "completed"
-        }
+    return blockchain.ingest(transfer_builder(blockchain, asset_id, from_user_id, to_user_id))
+
+def run_batch(blockchain: DAG, items: List[Dict], required: Tuple[str, ...], make_builder: Callable) -> List[Dict]:
+    # Items missing fields fail on their own; the rest are added in order in one batch
+    results = []
+    builders = []
+    positions = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            item = {}
+        results.append({"index": index, "asset_id": item.get("asset_id"),
+                        "success": False, "result": "Missing required fields"})
+        if all(item.get(field) for field in required):
+            builders.append(make_builder(item))
+            positions.append(index)
+
+    for index, (success, result) in zip(positions, blockchain.add_nodes(builders)):
+        results[index]["success"] = success
+        results[index]["result"] = result
+    return results
+
+def register_assets_batch(blockchain: DAG, items: List[Dict]) -> List[Dict]:
+    return run_batch(
+        blockchain, items, ("asset_id", "user_id"),
+        lambda item: register_builder(blockchain, item["asset_id"], item["user_id"], item.get("asset_data", {}))
     )
 
-    return blockchain.add_node(node)
+def transfer_assets_batch(blockchain: DAG, items: List[Dict]) -> List[Dict]:
+    return run_batch(
+        blockchain, items, ("asset_id", "from_user_id", "to_user_id"),
+        lambda item: transfer_builder(blockchain, item["asset_id"], item["from_user_id"], item["to_user_id"])
+    )
 
 def stake_asset(blockchain: DAG, asset_id: str, user_id: str, staking_amount: int = 2400) -> Tuple[bool, str]:
     return False, "Staking functionality has been removed"
 
 def verify_asset_ownership(blockchain: DAG, asset_id: str, user_id: str) -> bool:
     try:
-        ownership_history = blockchain.get_asset_ownership_history(asset_id)
+        current_owner = blockchain.get_current_owner(asset_id)
 
-        if not ownership_history:
-            logger.warning(f"Ownership verification failed: Asset {asset_id} not found")
+        if current_owner is None:
+            logger.warning("Ownership verification failed: Asset %s not found", asset_id)
             return False
 
-        is_owner = ownership_history[-1]["user_id"] == user_id
+        is_owner = current_owner == user_id
 
         if is_owner:
-            logger.info(f"Ownership verified: Asset {asset_id} is owned by {user_id}")
+            logger.info("Ownership verified: Asset %s is owned by %s", asset_id, user_id)
         else:
-            current_owner = ownership_history[-1]["user_id"]
-            logger.warning(f"Ownership verification failed: Asset {asset_id} is owned by {current_owner}, not {user_id}")
+            logger.warning("Ownership verification failed: Asset %s is owned by %s, not %s", asset_id, current_owner, user_id)
 
         return is_owner
 
@@ -439,11 +1199,42 @@ def verify_asset_ownership(blockchain: DAG, asset_id: str, user_id: str) -> bool
         return False
 
 app = Flask(__name__)
-blockchain = DAG("blockchain_dag.json")
+# Spawned audit workers re-import the main module as __mp_main__; they
+# only run audit.py functions and must not open the default store
+blockchain = DAG("blockchain_dag.json") if __name__ != "__mp_main__" else None
+
+instrument_app(app)
+# Read at scrape time from whichever DAG the module is serving
+REGISTRY.gauge("dag_nodes", "Nodes in the DAG").set_function(lambda: len(blockchain.nodes))
+REGISTRY.gauge("dag_tips", "Current tips").set_function(lambda: len(blockchain.tips))
+REGISTRY.gauge("dag_assets", "Registered assets").set_function(lambda: len(blockchain.registered_assets))
+REGISTRY.gauge("dag_records_since_checkpoint", "Writes not yet covered by a snapshot").set_function(
+    lambda: blockchain._records_since_checkpoint
+)
+REGISTRY.gauge("dag_ingest_queue_depth", "Writes waiting for the ingest writer").set_function(
+    lambda: blockchain._ingest.qsize() if blockchain._ingest is not None else None
+)
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "ok", "service": "InLock Blockchain API"})
+    return jsonify({
+        "status": "ok",
+        "service": "InLock Blockchain API",
+        "storage": {
+            "backend": blockchain.storage.name,
+            "durability": blockchain.durability,
+            "group_commit": blockchain._committer.stats if blockchain._committer else None,
+            "load": blockchain.load_stats,
+            "trusted_load": blockchain.storage.trusted_load,
+            "hash_verification": blockchain.hash_verification,
+            "last_checkpoint": blockchain.last_checkpoint,
+            "records_since_checkpoint": blockchain._records_since_checkpoint
+        },
+        "ingest": {
+            "queue_depth": blockchain._ingest.qsize(),
+            "queue_size": blockchain._ingest.maxsize
+        } if blockchain._ingest is not None else None
+    })
 
 @app.route('/process_nfc_tag', methods=['POST'])
 def process_nfc_tag():
@@ -462,13 +1253,7 @@ def process_nfc_tag():
             "scanned_timestamp": data.get('timestamp', 0)
         }
 
-        asset_exists = False
-        for node in blockchain.nodes.values():
-            if node.asset_id == tag_id and node.action == "register":
-                asset_exists = True
-                break
-
-        if asset_exists:
+        if blockchain.is_asset_registered(tag_id):
             return jsonify({
                 "success": False,
                 "message": "Asset already exists. Staking functionality has been removed.",
@@ -498,6 +1283,8 @@ def api_register_asset():
 
         if not asset_id or not user_id:
             return jsonify({"success": False, "message": "Missing required fields"}), 400
+        if not isinstance(asset_data, dict):
+            return jsonify({"success": False, "message": "asset_data must be a JSON object"}), 400
 
         success, result = register_asset(blockchain, asset_id, user_id, asset_data)
         return jsonify({"success": success, "result": result})
@@ -516,7 +1303,7 @@ def api_transfer_asset():
         if not asset_id or not from_user_id or not to_user_id:
             return jsonify({"success": False, "message": "Missing required fields"}), 400
 
-        logger.info(f"Transfer asset request: {asset_id} from {from_user_id} to {to_user_id}")
+        logger.info("Transfer asset request: %s from %s to %s", asset_id, from_user_id, to_user_id)
 
         if not verify_asset_ownership(blockchain, asset_id, from_user_id):
             return jsonify({
@@ -526,7 +1313,7 @@ def api_transfer_asset():
 
         success, result = transfer_asset(blockchain, asset_id, from_user_id, to_user_id)
 
-        logger.info(f"Transfer result: success={success}, result={result}")
+        logger.info("Transfer result: success=%s, result=%s", success, result)
 
         if success:
             return jsonify({"success": True, "result": result})
@@ -537,6 +1324,46 @@ def api_transfer_asset():
         logger.error(f"Error in transfer_asset: {str(e)}", exc_info=True)
         return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
 
+def _batch_items(data: Optional[Dict]) -> List[Dict]:
+    items = (data or {}).get('items')
+    if not isinstance(items, list) or not items:
+        raise ValueError("Request must include a non-empty items list")
+    if len(items) > MAX_BATCH_SIZE:
+        raise ValueError(f"Batch too large ({len(items)} items, at most {MAX_BATCH_SIZE})")
+    return items
+
+@app.route('/register_assets_batch', methods=['POST'])
+def api_register_assets_batch():
+    try:
+        try:
+            items = _batch_items(request.json)
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
+        results = register_assets_batch(blockchain, items)
+        succeeded = sum(1 for result in results if result["success"])
+        return jsonify({"success": succeeded == len(results), "succeeded": succeeded,
+                        "failed": len(results) - succeeded, "results": results})
+    except Exception as e:
+        logger.error(f"Error in register_assets_batch: {str(e)}", exc_info=True)
+        return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
+
+@app.route('/transfer_assets_batch', methods=['POST'])
+def api_transfer_assets_batch():
+    try:
+        try:
+            items = _batch_items(request.json)
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
+        results = transfer_assets_batch(blockchain, items)
+        succeeded = sum(1 for result in results if result["success"])
+        return jsonify({"success": succeeded == len(results), "succeeded": succeeded,
+                        "failed": len(results) - succeeded, "results": results})
+    except Exception as e:
+        logger.error(f"Error in transfer_assets_batch: {str(e)}", exc_info=True)
+        return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
+
 @app.route('/stake_asset', methods=['POST'])
 def api_stake_asset():
     return jsonify({"success": False, "message": "Staking functionality has been removed"}), 400
@@ -558,6 +1385,25 @@ def api_user_assets(user_id):
         logger.error(f"Error in user_assets: {str(e)}", exc_info=True)
         return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
 
+def conditional_response(asset_id: str, build: Callable[[], Any]) -> Response:
+    """Serve build() tagged with the asset's ETag, or 304 if the client's copy is current.
+
+    Responses only depend on the request and the asset's nodes, so a
+    matching If-None-Match skips building the body altogether. The tag is
+    taken first; a write racing the build can only make the body newer.
+    """
+    etag = blockchain.get_asset_etag(asset_id)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = make_response(build())
+        if response.status_code != 200:
+            return response
+    response.set_etag(etag)
+    # Cacheable, but revalidated on every use since assets change at any time
+    response.cache_control.no_cache = True
+    return response
+
 @app.route('/verify_ownership', methods=['GET'])
 def api_verify_ownership():
     try:
@@ -565,83 +1411,369 @@ def api_verify_ownership():
         user_id = request.args.get('user_id')
 
         if not asset_id or not user_id:
-            logger.warning(f"Missing parameters in verify_ownership: asset_id={asset_id}, user_id={user_id}")
+            logger.warning("Missing parameters in verify_ownership: asset_id=%s, user_id=%s", asset_id, user_id)
             return jsonify({"success": False, "message": "Missing required parameters"}), 400
 
-        logger.info(f"Verifying ownership of asset {asset_id} for user {user_id}")
+        def build():
+            logger.info("Verifying ownership of asset %s for user %s", asset_id, user_id)
 
-        is_owner = verify_asset_ownership(blockchain, asset_id, user_id)
+            is_owner = verify_asset_ownership(blockchain, asset_id, user_id)
 
-        if is_owner:
-            logger.info(f"Verification successful: {user_id} owns {asset_id}")
-            return jsonify({
-                "success": True,
-                "asset_id": asset_id,
-                "user_id": user_id,
-                "is_owner": True
-            })
-        else:
-            ownership_history = blockchain.get_asset_ownership_history(asset_id)
-            current_owner = ownership_history[-1]["user_id"] if ownership_history else "unknown"
+            if is_owner:
+                logger.info("Verification successful: %s owns %s", user_id, asset_id)
+                return jsonify({
+                    "success": True,
+                    "asset_id": asset_id,
+                    "user_id": user_id,
+                    "is_owner": True
+                })
+            else:
+                current_owner = blockchain.get_current_owner(asset_id) or "unknown"
+
+                logger.info("Verification failed: %s does not own %s, current owner is %s", user_id, asset_id, current_owner)
+                return jsonify({
+                    "success": True,
+                    "asset_id": asset_id,
+                    "user_id": user_id,
+                    "is_owner": False,
+                    "current_owner": current_owner
+                })
 
-            logger.info(f"Verification failed: {user_id} does not own {asset_id}, current owner is {current_owner}")
-            return jsonify({
-                "success": True,
-                "asset_id": asset_id,
-                "user_id": user_id,
-                "is_owner": False,
-                "current_owner": current_owner
-            })
+        return conditional_response(asset_id, build)
     except Exception as e:
         logger.error(f"Error in verify_ownership: {str(e)}", exc_info=True)
         return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
 
+MAX_PAGE_SIZE = 1000
+
+def encode_cursor(cursor: Optional[Tuple[float, str]]) -> Optional[str]:
+    if cursor is None:
+        return None
+    return f"{cursor[0]!r}:{cursor[1]}"
+
+def decode_cursor(value: str) -> Tuple[float, str]:
+    timestamp, _, node_id = value.partition(":")
+    if not node_id:
+        raise ValueError(f"Invalid cursor: {value}")
+    return float(timestamp), node_id
+
+def parse_range_args(default_limit: Optional[int] = None) -> Dict[str, Any]:
+    """Read since/until/limit/cursor from the query string, raising ValueError on bad input."""
+    args = request.args
+    since = args.get('since')
+    until = args.get('until')
+    limit = args.get('limit')
+    cursor = args.get('cursor')
+
+    limit = int(limit) if limit is not None else default_limit
+    if limit is not None and limit <= 0:
+        raise ValueError("limit must be a positive integer")
+
+    return {
+        "since": float(since) if since is not None else None,
+        "until": float(until) if until is not None else None,
+        "limit": limit,
+        "cursor": decode_cursor(cursor) if cursor else None
+    }
+
+def encoded_response(head: Dict[str, Any], key: str, fragments: Any) -> Response:
+    """JSON object of head plus key -> fragments, where fragments are already encoded.
+
+    A list of fragments becomes an array, a dict of them an object and bytes
+    are used as-is, so unchanged nodes and histories are stitched in rather
+    than re-serialized. Object keys must be strings: anything else would
+    not produce a valid JSON key.
+    """
+    if isinstance(fragments, bytes):
+        value = fragments
+    elif isinstance(fragments, dict):
+        if not all(isinstance(k, str) for k in fragments):
+            raise TypeError("encoded_response object keys must be strings")
+        value = b"{" + b",".join(json.dumps(k).encode() + b":" + v for k, v in fragments.items()) + b"}"
+    else:
+        value = b"[" + b",".join(fragments) + b"]"
+    body = json.dumps(head, separators=(",", ":")).encode()[:-1]
+    if head:
+        body += b","
+    return Response(body + json.dumps(key).encode() + b":" + value + b"}", mimetype="application/json")
+
 @app.route('/asset_history/<asset_id>', methods=['GET'])
 def api_asset_history(asset_id):
     try:
-        history = blockchain.get_asset_ownership_history(asset_id)
-        return jsonify({"asset_id": asset_id, "history": history})
+        try:
+            query = parse_range_args()
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
+        def build():
+            if not any(query.values()):
+                return encoded_response(
+                    {"asset_id": asset_id, "next_cursor": None},
+                    "history", blockchain.get_encoded_ownership_history(asset_id)
+                )
+
+            history, next_cursor = blockchain.get_asset_ownership_page(asset_id, **query)
+            return jsonify({"asset_id": asset_id, "history": history, "next_cursor": encode_cursor(next_cursor)})
+
+        return conditional_response(asset_id, build)
     except Exception as e:
         logger.error(f"Error in asset_history: {str(e)}", exc_info=True)
         return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
 
-@app.route('/asset_data/<asset_id>', methods=['GET'])
-def api_asset_data(asset_id):
+@app.route('/nodes', methods=['GET'])
+def api_nodes():
+    try:
+        try:
+            query = parse_range_args(default_limit=MAX_PAGE_SIZE)
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
+        query["limit"] = min(query["limit"], MAX_PAGE_SIZE)
+        nodes, next_cursor = blockchain.query_nodes(**query)
+        return encoded_response(
+            {"success": True, "next_cursor": encode_cursor(next_cursor)},
+            "nodes", [node.encode() for node in nodes]
+        )
+    except Exception as e:
+        logger.error(f"Error in nodes: {str(e)}", exc_info=True)
+        return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
+
+MAX_TRAVERSAL_DEPTH = 1000
+MAX_TRAVERSAL_NODES = 100000
+
+def parse_traversal_args() -> Tuple[int, int]:
+    depth = int(request.args.get('depth', 10))
+    limit = int(request.args.get('limit', 10000))
+    if depth <= 0 or limit <= 0:
+        raise ValueError("depth and limit must be positive integers")
+    return min(depth, MAX_TRAVERSAL_DEPTH), min(limit, MAX_TRAVERSAL_NODES)
+
+@app.route('/nodes/<node_id>/ancestors', methods=['GET'])
+def api_node_ancestors(node_id):
+    try:
+        try:
+            depth, limit = parse_traversal_args()
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
+        result = blockchain.get_ancestors(node_id, depth, limit)
+        if result is None:
+            return jsonify({"success": False, "message": f"Node {node_id} not found"}), 404
+        return jsonify({"success": True, **result})
+    except Exception as e:
+        logger.error(f"Error in node_ancestors: {str(e)}", exc_info=True)
+        return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
+
+@app.route('/nodes/<node_id>/descendants', methods=['GET'])
+def api_node_descendants(node_id):
     try:
+        try:
+            depth, limit = parse_traversal_args()
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
+        result = blockchain.get_descendants(node_id, depth, limit)
+        if result is None:
+            return jsonify({"success": False, "message": f"Node {node_id} not found"}), 404
+        return jsonify({"success": True, **result})
+    except Exception as e:
+        logger.error(f"Error in node_descendants: {str(e)}", exc_info=True)
+        return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
+
+@app.route('/asset_confirmation/<asset_id>', methods=['GET'])
+def api_asset_confirmation(asset_id):
+    try:
+        try:
+            depth, limit = parse_traversal_args()
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
         asset_nodes = blockchain.get_asset_nodes(asset_id)
-        register_node = next((node for node in asset_nodes if node.action == "register"), None)
+        if not asset_nodes:
+            return jsonify({"success": False, "message": f"Asset {asset_id} not found"}), 404
+
+        # Confirmation of the asset's latest state, i.e. its most recent node
+        latest = asset_nodes[-1]
+        result = blockchain.get_descendants(latest.node_id, depth, limit)
+        return jsonify({
+            "success": True,
+            "asset_id": asset_id,
+            "node_id": latest.node_id,
+            "action": latest.action,
+            "approval_weight": result["count"],
+            "confirmation_depth": result["depth"],
+            "truncated": result["truncated"]
+        })
+    except Exception as e:
+        logger.error(f"Error in asset_confirmation: {str(e)}", exc_info=True)
+        return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
 
-        data = {}
-        if register_node and register_node.data:
-            data = {k: str(v) for k, v in register_node.data.items()}
+@app.route('/merkle/root', methods=['GET'])
+def api_merkle_root():
+    return jsonify({"success": True, **blockchain.get_merkle_root()})
+
+@app.route('/merkle/buckets', methods=['GET'])
+def api_merkle_buckets():
+    return jsonify({"success": True, **blockchain.get_merkle_buckets()})
+
+@app.route('/merkle/bucket/<int:bucket>', methods=['GET'])
+def api_merkle_bucket(bucket):
+    if bucket >= BUCKET_COUNT:
+        return jsonify({"success": False, "message": f"Bucket must be between 0 and {BUCKET_COUNT - 1}"}), 400
+    return jsonify({"success": True, **blockchain.get_merkle_bucket(bucket)})
+
+def get_registration_data(blockchain: DAG, asset_id: str) -> Dict[str, str]:
+    asset_nodes = blockchain.get_asset_nodes(asset_id)
+    register_node = next((node for node in asset_nodes if node.action == "register"), None)
+
+    data = {}
+    # Registrations from older stores may carry non-object data
+    if register_node and isinstance(register_node.data, dict):
+        data = {k: str(v) for k, v in register_node.data.items()}
+    return data
+
+def _bulk_list(data: Optional[Dict], key: str, item_type: type = None) -> List:
+    values = (data or {}).get(key)
+    if not isinstance(values, list):
+        raise ValueError(f"Request must include a {key} list")
+    if len(values) > MAX_BATCH_SIZE:
+        raise ValueError(f"Too many {key} ({len(values)}, at most {MAX_BATCH_SIZE})")
+    if item_type is not None and not all(isinstance(value, item_type) for value in values):
+        raise ValueError(f"Every entry in {key} must be a {item_type.__name__}")
+    return values
 
-        return jsonify({"asset_id": asset_id, "data": data})
+@app.route('/asset_data/<asset_id>', methods=['GET'])
+def api_asset_data(asset_id):
+    try:
+        return conditional_response(
+            asset_id, lambda: jsonify({"asset_id": asset_id, "data": get_registration_data(blockchain, asset_id)})
+        )
     except Exception as e:
         logger.error(f"Error in asset_data: {str(e)}", exc_info=True)
         return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
 
+@app.route('/asset_history_batch', methods=['POST'])
+def api_asset_history_batch():
+    try:
+        try:
+            asset_ids = _bulk_list(request.json, 'asset_ids', str)
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
+        histories = {asset_id: blockchain.get_encoded_ownership_history(asset_id) for asset_id in asset_ids}
+        return encoded_response({"success": True}, "histories", histories)
+    except Exception as e:
+        logger.error(f"Error in asset_history_batch: {str(e)}", exc_info=True)
+        return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
+
+@app.route('/asset_data_batch', methods=['POST'])
+def api_asset_data_batch():
+    try:
+        try:
+            asset_ids = _bulk_list(request.json, 'asset_ids', str)
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
+        data = {asset_id: get_registration_data(blockchain, asset_id) for asset_id in asset_ids}
+        return jsonify({"success": True, "data": data})
+    except Exception as e:
+        logger.error(f"Error in asset_data_batch: {str(e)}", exc_info=True)
+        return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
+
+@app.route('/verify_ownership_batch', methods=['POST'])
+def api_verify_ownership_batch():
+    try:
+        try:
+            pairs = _bulk_list(request.json, 'pairs')
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
+        results = []
+        for pair in pairs:
+            asset_id = pair.get('asset_id') if isinstance(pair, dict) else None
+            user_id = pair.get('user_id') if isinstance(pair, dict) else None
+            if not asset_id or not user_id:
+                results.append({"asset_id": asset_id, "user_id": user_id, "success": False,
+                                "message": "Missing required parameters"})
+                continue
+            if not isinstance(asset_id, str) or not isinstance(user_id, str):
+                results.append({"asset_id": asset_id, "user_id": user_id, "success": False,
+                                "message": "asset_id and user_id must be strings"})
+                continue
+
+            current_owner = blockchain.get_current_owner(asset_id)
+            results.append({
+                "asset_id": asset_id,
+                "user_id": user_id,
+                "success": True,
+                "is_owner": current_owner is not None and current_owner == user_id,
+                "current_owner": current_owner
+            })
+        return jsonify({"success": True, "results": results})
+    except Exception as e:
+        logger.error(f"Error in verify_ownership_batch: {str(e)}", exc_info=True)
+        return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
+
+@app.route('/asset_versions_batch', methods=['POST'])
+def api_asset_versions_batch():
+    try:
+        try:
+            asset_ids = _bulk_list(request.json, 'asset_ids', str)
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
+        versions = {asset_id: blockchain.get_asset_version(asset_id) for asset_id in asset_ids}
+        return jsonify({"success": True, "versions": versions})
+    except Exception as e:
+        logger.error(f"Error in asset_versions_batch: {str(e)}", exc_info=True)
+        return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
+
 @app.route('/verify_integrity', methods=['GET'])
 def api_verify_integrity():
     try:
-        integrity_ok, message = blockchain.verify_integrity()
-        return jsonify({"integrity_ok": integrity_ok, "message": message})
+        full = request.args.get('full', 'false').lower() in ('1', 'true', 'yes')
+        integrity_ok, message = blockchain.verify_integrity(full=full)
+        return jsonify({
+            "integrity_ok": integrity_ok,
+            "message": message,
+            "full": full,
+            "verified_nodes": blockchain.verified_count
+        })
     except Exception as e:
         logger.error(f"Error in verify_integrity: {str(e)}", exc_info=True)
         return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
 
+@app.route('/audit', methods=['POST'])
+def api_start_audit():
+    try:
+        data = request.get_json(silent=True) or {}
+        workers = data.get('workers')
+        if workers is not None and (not isinstance(workers, int) or workers <= 0):
+            return jsonify({"success": False, "message": "workers must be a positive integer"}), 400
+
+        status = blockchain.start_audit(workers)
+        if status is None:
+            return jsonify({"success": False, "message": "An audit is already running",
+                            "audit": blockchain.audit.status}), 409
+        return jsonify({"success": True, "audit": status}), 202
+    except Exception as e:
+        logger.error(f"Error in start_audit: {str(e)}", exc_info=True)
+        return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
+
+@app.route('/audit', methods=['GET'])
+def api_audit_status():
+    if blockchain.audit is None:
+        return jsonify({"success": False, "message": "No audit has been started"}), 404
+    return jsonify({"success": True, "audit": blockchain.audit.status})
+
+@app.route('/tips', methods=['GET'])
+def api_tips():
+    return jsonify({"success": True, "tips": blockchain.get_tip_metrics()})
+
 @app.route('/blockchain_stats', methods=['GET'])
 def api_blockchain_stats():
     try:
-        stats = {
-            "total_nodes": len(blockchain.nodes),
-            "total_tips": len(blockchain.tips),
-            "unique_assets": len(set(node.asset_id for node in blockchain.nodes.values())),
-            "unique_users": len(set(node.user_id for node in blockchain.nodes.values())),
-            "action_counts": {
-                "register": len([node for node in blockchain.nodes.values() if node.action == "register"]),
-                "transfer": len([node for node in blockchain.nodes.values() if node.action == "transfer"])
-            }
-        }
+        stats = blockchain.get_stats()
         return jsonify({"success": True, "stats": stats})
     except Exception as e:
         logger.error(f"Error in blockchain_stats: {str(e)}", exc_info=True)
@@ -651,9 +1783,34 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Start a blockchain node')
     parser.add_argument('--port', type=int, default=5001, help='Port to run the blockchain on')
     parser.add_argument('--storage', type=str, default="blockchain_dag.json", help='Path to storage file')
+    parser.add_argument('--backend', type=str, default="json", choices=sorted(BACKENDS), help='Storage engine for the DAG')
+    parser.add_argument('--checkpoint-interval', type=float, default=60.0, help='Seconds between background snapshots')
+    parser.add_argument('--checkpoint-records', type=int, default=1000, help='Log records that force an early snapshot')
+    parser.add_argument('--durability', type=str, default="sync-per-write", choices=DURABILITY_POLICIES,
+                        help='When writes are persisted: before each acknowledgement, in group commits, or asynchronously')
+    parser.add_argument('--commit-window-ms', type=float, default=5.0, help='Group commit window in milliseconds')
+    parser.add_argument('--trusted-load', action='store_true', help='Load stored nodes without recomputing their hashes')
+    parser.add_argument('--ingest-queue', type=int, default=0,
+                        help='Feed writes through a single writer thread with a queue of this size (0 disables)')
+    parser.add_argument('--background-verify', action='store_true', help='Verify stored hashes in the background after startup')
+    parser.add_argument('--log-format', type=str, default=None, choices=LOG_FORMATS,
+                        help='Log line format (default: INLOCK_LOG_FORMAT or text)')
+    parser.add_argument('--log-rate', type=float, default=None,
+                        help='INFO records per call site per second, 0 for no limit (default: INLOCK_LOG_RATE or 0)')
     args = parser.parse_args()
 
-    blockchain = DAG(args.storage)
+    configure_logging(args.log_format, args.log_rate)
+
+    blockchain = DAG(args.storage, args.backend, args.durability, args.commit_window_ms, args.trusted_load)
+    if args.background_verify:
+        blockchain.start_hash_verifier()
+    if args.ingest_queue > 0:
+        blockchain.start_ingest(args.ingest_queue)
+    blockchain.start_checkpointer(args.checkpoint_interval, args.checkpoint_records)
+    # Group-committed writes may still be queued when the server stops;
+    # SIGTERM is turned into a normal exit so atexit handlers run
+    atexit.register(blockchain.shutdown)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
 
-    logger.info(f"Starting blockchain node on port {args.port} with storage {args.storage}")
+    logger.info(f"Starting blockchain node on port {args.port} with {args.backend} storage {args.storage}")
     app.run(host='0.0.0.0', port=args.port)
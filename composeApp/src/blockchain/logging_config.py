@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_FORMATS = ("text", "json")
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with any extra= fields kept as top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per call site for records at or below max_level.
+
+    Hot routes log the same line on every request; past rate records per
+    second a call site is dropped until tokens refill, and the next record
+    let through carries the number suppressed in between. Warnings and
+    errors always pass.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, max_level: int = logging.INFO):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self.max_level = max_level
+        # (pathname, lineno) -> [tokens, last refill, suppressed]
+        self._buckets: Dict[Tuple[str, int], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level:
+            return True
+
+        now = time.monotonic()
+        key = (record.pathname, record.lineno)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now, 0]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1.0
+            suppressed, bucket[2] = bucket[2], 0
+
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that leaves all formatting to the listener and never blocks.
+
+    The queue only crosses threads, so records are handed over as they
+    are instead of being pre-formatted on the calling thread. When the
+    queue is full the record is dropped and counted rather than waited on.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def configure_logging(
+    log_format: Optional[str] = None,
+    rate: Optional[float] = None,
+    queue_size: int = 10000,
+    level: int = logging.INFO
+) -> QueueListener:
+    """Route all logging through a background listener thread.
+
+    log_format and rate default to INLOCK_LOG_FORMAT and INLOCK_LOG_RATE
+    (INFO records per call site per second, 0 for no limit), so launchers
+    can configure child processes through the environment.
+    """
+    log_format = log_format or os.environ.get("INLOCK_LOG_FORMAT", "text")
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"Invalid log format: {log_format}. Must be one of {set(LOG_FORMATS)}")
+    if rate is None:
+        rate = float(os.environ.get("INLOCK_LOG_RATE", "0"))
+
+    output = logging.StreamHandler()
+    output.setFormatter(JsonFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT))
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    handler = NonBlockingQueueHandler(log_queue)
+    if rate > 0:
+        # Runs on the calling thread, so dropped records never reach the queue
+        handler.addFilter(RateLimitFilter(rate))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    listener = QueueListener(log_queue, output, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
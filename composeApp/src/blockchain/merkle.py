@@ -0,0 +1,78 @@
+import json
+import hashlib
+from typing import Dict, List, Set, Iterable
+
+from node import Node
+
+BUCKET_COUNT = 256
+DIGEST_MODULUS = 1 << 256
+
+def bucket_of(asset_id: str) -> int:
+    return hashlib.sha256(asset_id.encode()).digest()[0]
+
+# Node data fields each replica fills in for itself
+LOCAL_DATA_FIELDS = {"transfer_timestamp"}
+
+def leaf_value(node: Node) -> int:
+    # Replicas create their own node ids, timestamps and references for the
+    # same operation, so only the replica-independent content is hashed.
+    # Older stores may hold any JSON as data; non-objects are hashed as-is
+    data = node.data
+    if isinstance(data, dict):
+        data = {key: value for key, value in data.items() if key not in LOCAL_DATA_FIELDS}
+    content = json.dumps(
+        [node.asset_id, node.action, node.user_id, data],
+        sort_keys=True, separators=(",", ":")
+    )
+    return int.from_bytes(hashlib.sha256(content.encode()).digest(), "big")
+
+def fold(values: Iterable[int]) -> int:
+    total = 0
+    for value in values:
+        total = (total + value) % DIGEST_MODULUS
+    return total
+
+def to_hex(value: int) -> str:
+    return value.to_bytes(32, "big").hex()
+
+class MerkleDigest:
+    """Merkle tree over the DAG, with nodes bucketed by asset_id hash prefix.
+
+    Each bucket digest is the sum of its leaf hashes modulo 2**256, so it is
+    updated in O(1) per node and does not depend on arrival order. The root
+    is a binary hash tree over the bucket digests, rebuilt lazily.
+    """
+
+    def __init__(self):
+        self.buckets: List[int] = [0] * BUCKET_COUNT
+        self.counts: List[int] = [0] * BUCKET_COUNT
+        self.assets: List[Set[str]] = [set() for _ in range(BUCKET_COUNT)]
+        self._root = None
+
+    def add(self, node: Node, value: int = None):
+        # value is the node's leaf_value when the caller already computed it
+        if value is None:
+            value = leaf_value(node)
+        bucket = bucket_of(node.asset_id)
+        self.buckets[bucket] = (self.buckets[bucket] + value) % DIGEST_MODULUS
+        self.counts[bucket] += 1
+        self.assets[bucket].add(node.asset_id)
+        self._root = None
+
+    def bucket_digests(self) -> List[str]:
+        return [to_hex(value) for value in self.buckets]
+
+    def root(self) -> str:
+        if self._root is None:
+            level = [hashlib.sha256(value.to_bytes(32, "big")).digest() for value in self.buckets]
+            while len(level) > 1:
+                level = [hashlib.sha256(level[i] + level[i + 1]).digest() for i in range(0, len(level), 2)]
+            self._root = level[0].hex()
+        return self._root
+
+    def to_dict(self) -> Dict:
+        return {
+            "root": self.root(),
+            "bucket_count": BUCKET_COUNT,
+            "nodes": sum(self.counts)
+        }
@@ -0,0 +1,141 @@
+import sys
+import json
+import time
+import uuid
+import random
+import hashlib
+from typing import Dict, List, Any, Union
+
+def _to_digest(value: str) -> Union[bytes, str]:
+    # Lowercase sha256 hex round-trips through 32 raw bytes; anything else is
+    # kept verbatim so the public string value never changes
+    if isinstance(value, str) and len(value) == 64 and value == value.lower():
+        try:
+            return bytes.fromhex(value)
+        except ValueError:
+            pass
+    return value
+
+def _from_digest(value: Union[bytes, str]) -> str:
+    return value.hex() if isinstance(value, bytes) else value
+
+class Node:
+    VALID_ACTIONS = {"register", "transfer"}
+
+    # Replicas hold every node in memory, so avoid a per-instance __dict__,
+    # share repeated id strings and keep hex digests as raw bytes
+    __slots__ = ("asset_id", "action", "user_id", "timestamp", "references", "data", "node_id", "_signature", "_hash")
+
+    def __init__(
+        self,
+        asset_id: str,
+        action: str,
+        user_id: str,
+        timestamp: float = None,
+        references: List[str] = None,
+        signature: str = None,
+        node_id: str = None,
+        data: Dict[str, Any] = None
+    ):
+        if not asset_id:
+            raise ValueError("Asset ID cannot be empty")
+        if action not in self.VALID_ACTIONS:
+            raise ValueError(f"Invalid action: {action}. Must be one of {self.VALID_ACTIONS}")
+        if not user_id:
+            raise ValueError("User ID cannot be empty")
+
+        self.asset_id = sys.intern(asset_id)
+        self.action = sys.intern(action)
+        self.user_id = sys.intern(user_id)
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self.references = tuple(sys.intern(ref) for ref in references) if references else ()
+        self.data = data if data is not None else {}
+        self.signature = signature if signature is not None else self._generate_signature()
+        self.node_id = sys.intern(node_id if node_id is not None else str(uuid.uuid4()))
+        self.hash = self._calculate_hash()
+
+    @property
+    def signature(self) -> str:
+        return _from_digest(self._signature)
+
+    @signature.setter
+    def signature(self, value: str):
+        self._signature = _to_digest(value)
+
+    @property
+    def hash(self) -> str:
+        return _from_digest(self._hash)
+
+    @hash.setter
+    def hash(self, value: str):
+        self._hash = _to_digest(value)
+
+    def _generate_signature(self) -> str:
+        signature_base = f"{self.user_id}:{self.timestamp}:{random.randint(1, 1000000)}"
+        return hashlib.sha256(signature_base.encode()).hexdigest()
+
+    def _hash_preimage(self) -> bytes:
+        # Fixed by the hashes already stored on every replica; any change
+        # here would invalidate existing chains
+        return (
+            f"{self.asset_id}:{self.action}:{self.user_id}:"
+            f"{self.timestamp}:{':'.join(self.references)}:"
+            f"{self.signature}:{json.dumps(self.data, sort_keys=True)}"
+        ).encode()
+
+    def _calculate_hash(self) -> str:
+        return hashlib.sha256(self._hash_preimage()).hexdigest()
+
+    def encode(self) -> bytes:
+        """Canonical compact JSON of to_dict(), used for persisted records and HTTP responses.
+
+        Not kept on the node: a cached copy would roughly double the memory
+        of every node written or served. Hot histories are cached per asset
+        by the DAG instead.
+        """
+        return json.dumps(self.to_dict(), sort_keys=True, separators=(",", ":")).encode()
+
+    def to_dict(self) -> Dict:
+        return {
+            "node_id": self.node_id,
+            "asset_id": self.asset_id,
+            "action": self.action,
+            "user_id": self.user_id,
+            "timestamp": self.timestamp,
+            "references": list(self.references),
+            "signature": self.signature,
+            "hash": self.hash,
+            "data": self.data
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, trusted: bool = False) -> 'Node':
+        if trusted:
+            return cls._from_trusted_dict(data)
+
+        return cls(
+            asset_id=data["asset_id"],
+            action=data["action"],
+            user_id=data["user_id"],
+            timestamp=data["timestamp"],
+            references=data["references"],
+            signature=data["signature"],
+            node_id=data["node_id"],
+            data=data.get("data", {})
+        )
+
+    @classmethod
+    def _from_trusted_dict(cls, data: Dict) -> 'Node':
+        # Persisted records were validated when they were first added; take
+        # the stored hash as-is instead of re-running __init__ and rehashing
+        node = cls.__new__(cls)
+        node.asset_id = sys.intern(data["asset_id"])
+        node.action = sys.intern(data["action"])
+        node.user_id = sys.intern(data["user_id"])
+        node.timestamp = data["timestamp"]
+        node.references = tuple(sys.intern(ref) for ref in data["references"]) if data["references"] else ()
+        node.data = data.get("data", {})
+        node.signature = data["signature"]
+        node.node_id = sys.intern(data["node_id"])
+        node.hash = data["hash"]
+        return node
@@ -5,13 +5,30 @@ import time
 import threading
 import logging
 import os
-from flask import Flask, request, jsonify
-from typing import List, Dict, Any, Tuple, Set, Optional
+from collections import Counter
+from flask import Flask, Response, request, jsonify, make_response
+from typing import Callable, List, Dict, Any, Tuple, Set, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from metrics import REGISTRY, instrument_app
+from logging_config import configure_logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('blockchain_orchestrator')
 
+# Same limit the replicas enforce, so a bulk request they would reject is
+# turned away before it is fanned out
+MAX_BATCH_SIZE = 5000
+
+REPLICA_REQUEST_SECONDS = REGISTRY.histogram(
+    "orchestrator_replica_request_duration_seconds", "Latency of requests to each replica", ("replica", "call")
+)
+REPLICA_REQUESTS = REGISTRY.counter(
+    "orchestrator_replica_requests_total", "Requests to each replica by HTTP status, or error", ("replica", "call", "outcome")
+)
+FAN_OUT_SECONDS = REGISTRY.histogram(
+    "orchestrator_fan_out_duration_seconds", "Time until every replica answered a bulk fan-out", ("call",)
+)
+
 class BlockchainOrchestrator:
 
     def __init__(self, blockchain_ports: List[int] = None):
@@ -28,17 +45,31 @@ class BlockchainOrchestrator:
         else:
             logger.info(f"Found {len(self.active_urls)} active blockchain instances")
 
+    def _replica_request(self, method: str, url: str, path: str, **kwargs) -> requests.Response:
+        # The first path segment names the call, keeping asset ids out of labels
+        call = path.strip("/").split("/", 1)[0]
+        started = time.perf_counter()
+        try:
+            response = requests.request(method, f"{url}{path}", **kwargs)
+        except Exception:
+            REPLICA_REQUESTS.inc(replica=url, call=call, outcome="error")
+            raise
+        finally:
+            REPLICA_REQUEST_SECONDS.observe(time.perf_counter() - started, replica=url, call=call)
+        REPLICA_REQUESTS.inc(replica=url, call=call, outcome=response.status_code)
+        return response
+
     def _check_active_blockchains(self) -> List[str]:
 
         active_urls = []
 
         def check_health(url):
             try:
-                response = requests.get(f"{url}/health", timeout=2)
+                response = self._replica_request("GET", url, "/health", timeout=2)
                 if response.status_code == 200:
                     return url
             except Exception as e:
-                logger.debug(f"Blockchain at {url} not responding: {str(e)}")
+                logger.debug("Blockchain at %s not responding: %s", url, e)
             return None
 
         futures = [self.executor.submit(check_health, url) for url in self.base_urls]
@@ -59,7 +90,7 @@ class BlockchainOrchestrator:
         target_count = min(len(self.active_urls), max(self.min_consensus, 3))
         selected_urls = random.sample(self.active_urls, target_count)
 
-        logger.info(f"Registering asset {asset_id} for user {user_id} across {target_count} blockchain instances")
+        logger.info("Registering asset %s for user %s across %s blockchain instances", asset_id, user_id, target_count)
 
         registration_data = {
             "asset_id": asset_id,
@@ -72,21 +103,21 @@ class BlockchainOrchestrator:
 
         def register_on_blockchain(url):
             try:
-                response = requests.post(
-                    f"{url}/register_asset",
+                response = self._replica_request(
+                    "POST", url, "/register_asset",
                     json=registration_data,
                     timeout=5
                 )
                 if response.status_code == 200:
                     result = response.json()
                     if result.get("success"):
-                        logger.info(f"Successfully registered on {url}: {result.get('result')}")
+                        logger.info("Successfully registered on %s: %s", url, result.get('result'))
                         return (True, url, result.get("result"))
                     else:
-                        logger.warning(f"Registration failed on {url}: {result.get('message')}")
+                        logger.warning("Registration failed on %s: %s", url, result.get('message'))
                         return (False, url, result.get("message"))
                 else:
-                    logger.warning(f"Registration failed on {url}, status: {response.status_code}")
+                    logger.warning("Registration failed on %s, status: %s", url, response.status_code)
                     return (False, url, f"HTTP {response.status_code}")
             except Exception as e:
                 logger.error(f"Error registering on {url}: {str(e)}")
@@ -101,16 +132,16 @@ class BlockchainOrchestrator:
 
         success_count = len(successes)
         if success_count >= self.min_consensus:
-            logger.info(f"Asset {asset_id} registered with consensus ({success_count}/{target_count})")
+            logger.info("Asset %s registered with consensus (%s/%s)", asset_id, success_count, target_count)
             return True, f"Asset registered with consensus ({success_count}/{target_count})", node_ids
         else:
-            logger.warning(f"Failed to reach consensus for asset {asset_id} ({success_count}/{self.min_consensus})")
+            logger.warning("Failed to reach consensus for asset %s (%s/%s)", asset_id, success_count, self.min_consensus)
             self._cleanup_registrations(asset_id, successes)
             return False, f"Failed to reach consensus ({success_count}/{self.min_consensus})", []
 
     def _cleanup_registrations(self, asset_id: str, urls: List[str]):
 
-        logger.info(f"Cleanup needed for asset {asset_id} on {len(urls)} blockchain instances")
+        logger.info("Cleanup needed for asset %s on %s blockchain instances", asset_id, len(urls))
 
     def transfer_asset(self, asset_id: str, from_user_id: str, to_user_id: str) -> Tuple[bool, str, List[str]]:
 
@@ -119,30 +150,19 @@ class BlockchainOrchestrator:
 
         self.active_urls = self._check_active_blockchains()
 
-        blockchains_with_asset = self._find_blockchains_with_asset(asset_id)
+        blockchains_with_asset, valid_blockchains = self._ownership_on_replicas(asset_id, from_user_id, refresh=False)
 
         if len(blockchains_with_asset) < self.min_consensus:
-            valid_blockchains = []
-
-            for url in blockchains_with_asset:
-                if self._verify_ownership(url, asset_id, from_user_id):
-                    valid_blockchains.append(url)
-
             if len(valid_blockchains) > 0:
-                logger.info(f"Asset {asset_id} found on {len(valid_blockchains)} blockchains, "
-                            f"but below consensus threshold ({self.min_consensus})")
+                logger.info("Asset %s found on %s blockchains, but below consensus threshold (%s)",
+                            asset_id, len(valid_blockchains), self.min_consensus)
 
                 self._replicate_asset(asset_id, from_user_id, valid_blockchains)
 
-                blockchains_with_asset = self._find_blockchains_with_asset(asset_id)
+                blockchains_with_asset, valid_blockchains = self._ownership_on_replicas(asset_id, from_user_id, refresh=False)
             else:
                 return False, f"Asset {asset_id} not owned by {from_user_id} on any blockchain", []
 
-        valid_blockchains = []
-        for url in blockchains_with_asset:
-            if self._verify_ownership(url, asset_id, from_user_id):
-                valid_blockchains.append(url)
-
         if len(valid_blockchains) < self.min_consensus:
             return False, (f"Ownership verification failed: Asset {asset_id} is not owned by {from_user_id} "
                            f"on enough blockchains ({len(valid_blockchains)}/{self.min_consensus})"), []
@@ -158,21 +178,21 @@ class BlockchainOrchestrator:
 
         def transfer_on_blockchain(url):
             try:
-                response = requests.post(
-                    f"{url}/transfer_asset",
+                response = self._replica_request(
+                    "POST", url, "/transfer_asset",
                     json=transfer_data,
                     timeout=5
                 )
                 if response.status_code == 200:
                     result = response.json()
                     if result.get("success"):
-                        logger.info(f"Successfully transferred on {url}: {result.get('result')}")
+                        logger.info("Successfully transferred on %s: %s", url, result.get('result'))
                         return (True, url, result.get("result"))
                     else:
-                        logger.warning(f"Transfer failed on {url}: {result.get('result', 'unknown')}")
+                        logger.warning("Transfer failed on %s: %s", url, result.get('result', 'unknown'))
                         return (False, url, result.get("result", "unknown"))
                 else:
-                    logger.warning(f"Transfer failed on {url}, status: {response.status_code}")
+                    logger.warning("Transfer failed on %s, status: %s", url, response.status_code)
                     return (False, url, f"HTTP {response.status_code}")
             except Exception as e:
                 logger.error(f"Error transferring on {url}: {str(e)}")
@@ -187,11 +207,11 @@ class BlockchainOrchestrator:
 
         success_count = len(successes)
         if success_count >= self.min_consensus:
-            logger.info(f"Asset {asset_id} transferred with consensus ({success_count}/{len(valid_blockchains)})")
+            logger.info("Asset %s transferred with consensus (%s/%s)", asset_id, success_count, len(valid_blockchains))
             return True, f"Asset transferred with consensus ({success_count}/{len(valid_blockchains)})", node_ids
         else:
-            logger.warning(f"Failed to reach consensus for transfer of asset {asset_id} "
-                           f"({success_count}/{self.min_consensus})")
+            logger.warning("Failed to reach consensus for transfer of asset %s (%s/%s)",
+                           asset_id, success_count, self.min_consensus)
             return False, f"Transfer failed to reach consensus ({success_count}/{self.min_consensus})", []
 
     def _find_blockchains_with_asset(self, asset_id: str) -> List[str]:
@@ -200,14 +220,14 @@ class BlockchainOrchestrator:
 
         def check_asset(url):
             try:
-                response = requests.get(f"{url}/asset_history/{asset_id}", timeout=2)
+                response = self._replica_request("GET", url, f"/asset_history/{asset_id}", timeout=2)
                 if response.status_code == 200:
                     result = response.json()
                     history = result.get("history", [])
                     if history:
                         return url
             except Exception as e:
-                logger.debug(f"Error checking asset on {url}: {str(e)}")
+                logger.debug("Error checking asset on %s: %s", url, e)
             return None
 
         futures = [self.executor.submit(check_asset, url) for url in self.active_urls]
@@ -218,49 +238,34 @@ class BlockchainOrchestrator:
 
         return blockchains_with_asset
 
-    def _verify_ownership(self, url: str, asset_id: str, user_id: str) -> bool:
-
-        try:
-            response = requests.get(
-                f"{url}/verify_ownership",
-                params={"asset_id": asset_id, "user_id": user_id},
-                timeout=2
-            )
-            if response.status_code == 200:
-                result = response.json()
-                return result.get("is_owner", False)
-        except Exception as e:
-            logger.warning(f"Error verifying ownership on {url}: {str(e)}")
-        return False
-
     def _replicate_asset(self, asset_id: str, user_id: str, source_blockchains: List[str]):
 
         if not source_blockchains:
-            logger.warning(f"Cannot replicate asset {asset_id} - no source blockchains provided")
+            logger.warning("Cannot replicate asset %s - no source blockchains provided", asset_id)
             return
 
         asset_data = self._get_asset_data(source_blockchains[0], asset_id)
         if not asset_data:
-            logger.warning(f"Failed to get asset data for replication: {asset_id}")
+            logger.warning("Failed to get asset data for replication: %s", asset_id)
             return
 
         target_blockchain_count = self.min_consensus
         needed_count = target_blockchain_count - len(source_blockchains)
 
         if needed_count <= 0:
-            logger.info(f"Asset {asset_id} already exists on enough blockchains")
+            logger.info("Asset %s already exists on enough blockchains", asset_id)
             return
 
         candidates = [url for url in self.active_urls if url not in source_blockchains]
 
         if len(candidates) < needed_count:
-            logger.warning(f"Not enough available blockchains for replication: "
-                          f"need {needed_count}, found {len(candidates)}")
+            logger.warning("Not enough available blockchains for replication: need %s, found %s",
+                           needed_count, len(candidates))
             return
 
         target_blockchains = random.sample(candidates, needed_count)
 
-        logger.info(f"Replicating asset {asset_id} to {needed_count} more blockchains")
+        logger.info("Replicating asset %s to %s more blockchains", asset_id, needed_count)
 
         registration_data = {
             "asset_id": asset_id,
@@ -272,21 +277,21 @@ class BlockchainOrchestrator:
 
         def register_on_blockchain(url):
             try:
-                response = requests.post(
-                    f"{url}/register_asset",
+                response = self._replica_request(
+                    "POST", url, "/register_asset",
                     json=registration_data,
                     timeout=5
                 )
                 if response.status_code == 200:
                     result = response.json()
                     if result.get("success"):
-                        logger.info(f"Successfully replicated on {url}: {result.get('result')}")
+                        logger.info("Successfully replicated on %s: %s", url, result.get('result'))
                         return (True, url)
                     else:
-                        logger.warning(f"Replication failed on {url}: {result.get('message')}")
+                        logger.warning("Replication failed on %s: %s", url, result.get('message'))
                         return (False, url)
                 else:
-                    logger.warning(f"Replication failed on {url}, status: {response.status_code}")
+                    logger.warning("Replication failed on %s, status: %s", url, response.status_code)
                     return (False, url)
             except Exception as e:
                 logger.error(f"Error replicating on {url}: {str(e)}")
@@ -298,90 +303,207 @@ class BlockchainOrchestrator:
             if success:
                 successes.append(url)
 
-        logger.info(f"Replicated asset {asset_id} to {len(successes)}/{needed_count} additional blockchains")
+        logger.info("Replicated asset %s to %s/%s additional blockchains", asset_id, len(successes), needed_count)
 
     def _get_asset_data(self, url: str, asset_id: str) -> Dict[str, Any]:
 
         try:
-            response = requests.get(f"{url}/asset_data/{asset_id}", timeout=2)
+            response = self._replica_request("GET", url, f"/asset_data/{asset_id}", timeout=2)
             if response.status_code == 200:
                 result = response.json()
                 return result.get("data", {})
         except Exception as e:
-            logger.warning(f"Error getting asset data from {url}: {str(e)}")
+            logger.warning("Error getting asset data from %s: %s", url, e)
         return {}
 
     def get_asset_data(self, asset_id: str) -> Dict[str, Any]:
+        return self.get_assets_data([asset_id])[asset_id]
 
-        self.active_urls = self._check_active_blockchains()
-
-        blockchains_with_asset = self._find_blockchains_with_asset(asset_id)
+    def _post_bulk(self, url: str, path: str, payload: Dict[str, Any], key: str) -> Any:
 
-        if len(blockchains_with_asset) < self.min_consensus:
-            logger.warning(f"Asset {asset_id} not found on enough blockchains ({len(blockchains_with_asset)}/{self.min_consensus})")
-            return {}
-
-        asset_data_list = []
-
-        def get_data_from_blockchain(url):
-            return self._get_asset_data(url, asset_id)
+        try:
+            response = self._replica_request("POST", url, f"/{path}", json=payload, timeout=10)
+            if response.status_code == 200:
+                result = response.json()
+                return result.get(key)
+        except Exception as e:
+            logger.warning("Error calling %s on %s: %s", path, url, e)
+        return None
+
+    def _fan_out_bulk(self, path: str, payload: Dict[str, Any], key: str, refresh: bool = True) -> Dict[str, Any]:
+        # One bulk request per active replica instead of one per asset
+        if refresh:
+            self.active_urls = self._check_active_blockchains()
+
+        with FAN_OUT_SECONDS.time(call=path):
+            futures = {self.executor.submit(self._post_bulk, url, path, payload, key): url for url in self.active_urls}
+            responses = {}
+            for future in as_completed(futures):
+                result = future.result()
+                if result is not None:
+                    responses[futures[future]] = result
+        return responses
+
+    def get_asset_histories(self, asset_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+
+        responses = self._fan_out_bulk("asset_history_batch", {"asset_ids": asset_ids}, "histories")
+
+        histories = {}
+        for asset_id in asset_ids:
+            history_list = [result[asset_id] for result in responses.values() if result.get(asset_id)]
+            if len(history_list) < self.min_consensus:
+                logger.warning("Could not get asset history with consensus for %s (%s/%s)", asset_id, len(history_list), self.min_consensus)
+                histories[asset_id] = []
+            else:
+                histories[asset_id] = history_list[0]
+        return histories
 
-        futures = [self.executor.submit(get_data_from_blockchain, url) for url in blockchains_with_asset]
-        for future in as_completed(futures):
-            data = future.result()
-            if data:
-                asset_data_list.append(data)
+    def get_assets_data(self, asset_ids: List[str]) -> Dict[str, Dict[str, Any]]:
 
-        if len(asset_data_list) < self.min_consensus:
-            logger.warning(f"Could not get asset data with consensus for {asset_id} ({len(asset_data_list)}/{self.min_consensus})")
-            return {}
+        responses = self._fan_out_bulk("asset_data_batch", {"asset_ids": asset_ids}, "data")
 
-        return asset_data_list[0]
+        assets_data = {}
+        for asset_id in asset_ids:
+            # Registered assets always carry at least the register node's data
+            asset_data_list = [result[asset_id] for result in responses.values() if result.get(asset_id)]
+            if len(asset_data_list) < self.min_consensus:
+                logger.warning("Could not get asset data with consensus for %s (%s/%s)", asset_id, len(asset_data_list), self.min_consensus)
+                assets_data[asset_id] = {}
+            else:
+                assets_data[asset_id] = asset_data_list[0]
+        return assets_data
+
+    def get_asset_versions(self, asset_ids: List[str]) -> Dict[str, Optional[int]]:
+        # Skips the health refresh so revalidating an unchanged asset costs
+        # a single round of requests
+        responses = self._fan_out_bulk("asset_versions_batch", {"asset_ids": asset_ids}, "versions", refresh=False)
+
+        versions = {}
+        for asset_id in asset_ids:
+            counts = Counter(result[asset_id] for result in responses.values() if result.get(asset_id))
+            version, votes = counts.most_common(1)[0] if counts else (None, 0)
+            # Only a version held by a consensus of replicas can tag a response
+            versions[asset_id] = version if votes >= self.min_consensus else None
+        return versions
+
+    def _ownership_on_replicas(self, asset_id: str, user_id: str, refresh: bool = True) -> Tuple[List[str], List[str]]:
+        # Replicas holding the asset, and those where user_id is its current owner
+        pairs = [{"asset_id": asset_id, "user_id": user_id}]
+        responses = self._fan_out_bulk("verify_ownership_batch", {"pairs": pairs}, "results", refresh)
+
+        holders = [url for url, result in responses.items() if result and result[0].get("current_owner") is not None]
+        owners = [url for url in holders if responses[url][0].get("is_owner")]
+        return holders, owners
+
+    def verify_ownerships(self, pairs: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+
+        responses = self._fan_out_bulk("verify_ownership_batch", {"pairs": pairs}, "results")
+
+        results = []
+        for index, pair in enumerate(pairs):
+            answers = [result[index] for result in responses.values()
+                       if index < len(result) and result[index].get("success")]
+            holders = [answer for answer in answers if answer.get("current_owner") is not None]
+            verified_count = sum(1 for answer in holders if answer.get("is_owner"))
+            results.append({
+                "asset_id": pair.get("asset_id"),
+                "user_id": pair.get("user_id"),
+                "is_owner": verified_count >= self.min_consensus,
+                "verified_count": verified_count,
+                "total_blockchains": len(holders),
+                "min_consensus": self.min_consensus
+            })
+        return results
 
     def _get_asset_history(self, url: str, asset_id: str) -> List[Dict[str, Any]]:
 
         try:
-            response = requests.get(f"{url}/asset_history/{asset_id}", timeout=2)
+            response = self._replica_request("GET", url, f"/asset_history/{asset_id}", timeout=2)
             if response.status_code == 200:
                 result = response.json()
                 return result.get("history", [])
         except Exception as e:
-            logger.warning(f"Error getting asset history from {url}: {str(e)}")
+            logger.warning("Error getting asset history from %s: %s", url, e)
         return []
 
     def get_asset_history(self, asset_id: str) -> List[Dict[str, Any]]:
+        return self.get_asset_histories([asset_id])[asset_id]
 
-        self.active_urls = self._check_active_blockchains()
-
-        blockchains_with_asset = self._find_blockchains_with_asset(asset_id)
+    def _get_merkle(self, url: str, path: str) -> Optional[Dict[str, Any]]:
 
-        if len(blockchains_with_asset) < self.min_consensus:
-            logger.warning(f"Asset {asset_id} not found on enough blockchains ({len(blockchains_with_asset)}/{self.min_consensus})")
-            return []
+        try:
+            response = self._replica_request("GET", url, f"/merkle/{path}", timeout=2)
+            if response.status_code == 200:
+                return response.json()
+        except Exception as e:
+            logger.warning("Error getting merkle %s from %s: %s", path, url, e)
+        return None
 
-        history_list = []
+    def compare_replicas(self) -> Dict[str, Any]:
 
-        def get_history_from_blockchain(url):
-            return self._get_asset_history(url, asset_id)
+        self.active_urls = self._check_active_blockchains()
 
-        futures = [self.executor.submit(get_history_from_blockchain, url) for url in blockchains_with_asset]
+        roots = {}
+        futures = {self.executor.submit(self._get_merkle, url, "root"): url for url in self.active_urls}
         for future in as_completed(futures):
-            history = future.result()
-            if history:
-                history_list.append(history)
+            result = future.result()
+            if result:
+                roots[futures[future]] = result["root"]
 
-        if len(history_list) < self.min_consensus:
-            logger.warning(f"Could not get asset history with consensus for {asset_id} ({len(history_list)}/{self.min_consensus})")
-            return []
+        groups: Dict[str, List[str]] = {}
+        for url, root in roots.items():
+            groups.setdefault(root, []).append(url)
 
-        return history_list[0]
+        report = {
+            "consistent": len(groups) <= 1,
+            "replicas": len(roots),
+            "roots": groups,
+            "divergent": {}
+        }
+        if len(groups) <= 1:
+            return report
+
+        # Compare every minority replica against one replica of the majority
+        # root, narrowing down to buckets and then to assets
+        majority_root = max(groups, key=lambda root: len(groups[root]))
+        reference_url = groups[majority_root][0]
+        reference = self._get_merkle(reference_url, "buckets")
+        if reference is None:
+            return report
+        report["majority_root"] = majority_root
+
+        reference_buckets = {}
+        for root, urls in groups.items():
+            if root == majority_root:
+                continue
+            for url in urls:
+                buckets = self._get_merkle(url, "buckets")
+                if buckets is None:
+                    continue
+
+                differing = {}
+                for index, digest in enumerate(buckets["buckets"]):
+                    if digest == reference["buckets"][index]:
+                        continue
+                    if index not in reference_buckets:
+                        reference_buckets[index] = self._get_merkle(reference_url, f"bucket/{index}") or {"assets": {}}
+                    bucket = self._get_merkle(url, f"bucket/{index}") or {"assets": {}}
+                    expected = reference_buckets[index]["assets"]
+                    actual = bucket["assets"]
+                    differing[index] = sorted(
+                        asset_id for asset_id in set(expected) | set(actual)
+                        if expected.get(asset_id) != actual.get(asset_id)
+                    )
+                report["divergent"][url] = differing
+
+        return report
 
     def stake_asset(self, asset_id: str, user_id: str, staking_amount: int = 2400) -> Tuple[bool, str, List[str]]:
         return False, "Staking functionality has been removed", []
 
     def get_user_balance(self, user_id: str) -> int:
         # User balance functionality simplified - always returns 0 as staking is removed
-        logger.info(f"User {user_id} balance request - returning 0 (staking functionality removed)")
+        logger.info("User %s balance request - returning 0 (staking functionality removed)", user_id)
         return 0
 
     def get_user_assets(self, user_id: str) -> List[str]:
@@ -392,12 +514,12 @@ class BlockchainOrchestrator:
 
         def get_assets_from_blockchain(url):
             try:
-                response = requests.get(f"{url}/user_assets/{user_id}", timeout=2)
+                response = self._replica_request("GET", url, f"/user_assets/{user_id}", timeout=2)
                 if response.status_code == 200:
                     result = response.json()
                     return result.get("assets", [])
             except Exception as e:
-                logger.debug(f"Error getting assets from {url}: {str(e)}")
+                logger.debug("Error getting assets from %s: %s", url, e)
             return []
 
         futures = [self.executor.submit(get_assets_from_blockchain, url) for url in self.active_urls]
@@ -405,7 +527,7 @@ class BlockchainOrchestrator:
             assets = future.result()
             all_assets.update(assets)
 
-        logger.info(f"User {user_id} has {len(all_assets)} unique assets across all blockchains")
+        logger.info("User %s has %s unique assets across all blockchains", user_id, len(all_assets))
         return list(all_assets)
 
     def get_asset_staking_status(self, asset_id: str) -> Optional[Dict[str, Any]]:
@@ -414,7 +536,7 @@ class BlockchainOrchestrator:
         blockchains_with_asset = self._find_blockchains_with_asset(asset_id)
         
         if not blockchains_with_asset:
-            logger.warning(f"Asset {asset_id} not found on any blockchain")
+            logger.warning("Asset %s not found on any blockchain", asset_id)
             return None
             
         # Try to get the current owner
@@ -427,7 +549,7 @@ class BlockchainOrchestrator:
                     "owner_id": current_owner
                 }
         except Exception as e:
-            logger.debug(f"Error getting asset history: {str(e)}")
+            logger.debug("Error getting asset history: %s", e)
             
         return {
             "is_staked": False,
@@ -438,6 +560,11 @@ class BlockchainOrchestrator:
 app = Flask(__name__)
 orchestrator = BlockchainOrchestrator()
 
+instrument_app(app)
+REGISTRY.gauge("orchestrator_active_replicas", "Replicas that passed the last health check").set_function(
+    lambda: len(orchestrator.active_urls)
+)
+
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({
@@ -447,6 +574,15 @@ def health_check():
         "min_consensus": orchestrator.min_consensus
     })
 
+@app.route('/replica_consistency', methods=['GET'])
+def api_replica_consistency():
+    try:
+        report = orchestrator.compare_replicas()
+        return jsonify({"success": True, **report})
+    except Exception as e:
+        logger.error(f"Error in replica_consistency: {str(e)}", exc_info=True)
+        return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
+
 @app.route('/register_asset', methods=['POST'])
 def api_register_asset():
     try:
@@ -457,6 +593,8 @@ def api_register_asset():
 
         if not asset_id or not user_id:
             return jsonify({"success": False, "message": "Missing required fields"}), 400
+        if not isinstance(asset_data, dict):
+            return jsonify({"success": False, "message": "asset_data must be a JSON object"}), 400
 
         success, message, node_ids = orchestrator.register_asset(asset_id, user_id, asset_data)
 
@@ -472,66 +610,54 @@ def api_register_asset():
 @app.route('/transfer_asset', methods=['POST'])
 def api_transfer_asset():
     try:
-        logger.info("🔄 ORCHESTRATOR: Received transfer_asset request")
         data = request.json
         asset_id = data.get('asset_id')
         from_user_id = data.get('from_user_id')
         to_user_id = data.get('to_user_id')
 
-        logger.info(f"🔄 ORCHESTRATOR: Transfer request details - Asset: {asset_id}, From: {from_user_id}, To: {to_user_id}")
+        logger.debug("Transfer request - Asset: %s, From: %s, To: %s", asset_id, from_user_id, to_user_id)
 
         if not asset_id or not from_user_id or not to_user_id:
-            logger.error(f"❌ ORCHESTRATOR ERROR: Missing required fields in transfer request")
+            logger.warning("Missing required fields in transfer request")
             return jsonify({"success": False, "message": "Missing required fields"}), 400
 
-        active_blockchains = len(orchestrator.active_urls)
-        logger.info(f"🔄 ORCHESTRATOR: Active blockchains before transfer: {active_blockchains}")
-
         try:
-            blockchains_with_asset = orchestrator._find_blockchains_with_asset(asset_id)
-            logger.info(f"🔄 ORCHESTRATOR: Asset found on {len(blockchains_with_asset)} blockchains")
+            blockchains_with_asset, valid_blockchains = orchestrator._ownership_on_replicas(asset_id, from_user_id)
 
             if len(blockchains_with_asset) == 0:
-                logger.error(f"❌ ORCHESTRATOR ERROR: Asset {asset_id} not found on any blockchain")
+                logger.warning("Transfer rejected: asset %s not found on any blockchain", asset_id)
                 return jsonify({
                     "success": False,
                     "message": f"Asset {asset_id} not found on any blockchain",
                     "node_ids": []
                 })
 
-            valid_blockchains = []
-            for url in blockchains_with_asset:
-                if orchestrator._verify_ownership(url, asset_id, from_user_id):
-                    valid_blockchains.append(url)
-
-            logger.info(f"🔄 ORCHESTRATOR: Ownership verified on {len(valid_blockchains)}/{len(blockchains_with_asset)} blockchains")
+            logger.debug("Ownership verified on %s/%s blockchains", len(valid_blockchains), len(blockchains_with_asset))
 
             if len(valid_blockchains) < orchestrator.min_consensus:
-                logger.error(f"❌ ORCHESTRATOR ERROR: Insufficient ownership verification ({len(valid_blockchains)}/{orchestrator.min_consensus})")
+                logger.warning("Transfer rejected: insufficient ownership verification (%s/%s)",
+                               len(valid_blockchains), orchestrator.min_consensus)
                 return jsonify({
                     "success": False,
                     "message": f"Ownership verification failed: {from_user_id} is not the owner on enough blockchains",
                     "node_ids": []
                 })
         except Exception as verify_err:
-            logger.error(f"❌ ORCHESTRATOR ERROR: Error during ownership verification: {str(verify_err)}", exc_info=True)
+            logger.error(f"Error during ownership verification: {str(verify_err)}", exc_info=True)
 
-        logger.info(f"🔄 ORCHESTRATOR: Executing transfer_asset operation")
         success, message, node_ids = orchestrator.transfer_asset(asset_id, from_user_id, to_user_id)
 
-        logger.info(f"{'✅' if success else '❌'} ORCHESTRATOR: Transfer result - Success: {success}, Message: {message}, Nodes: {node_ids}")
+        logger.info("Transfer of %s from %s to %s: success=%s, %s",
+                    asset_id, from_user_id, to_user_id, success, message,
+                    extra={"asset_id": asset_id, "success": success, "node_ids": node_ids})
 
-        response_data = {
+        return jsonify({
             "success": success,
             "message": message,
             "node_ids": node_ids
-        }
-
-        logger.info(f"🔄 ORCHESTRATOR: Sending response: {response_data}")
-
-        return jsonify(response_data)
+        })
     except Exception as e:
-        logger.error(f"❌ ORCHESTRATOR ERROR: Unhandled exception in transfer_asset: {str(e)}", exc_info=True)
+        logger.error(f"Unhandled exception in transfer_asset: {str(e)}", exc_info=True)
         return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
 
 @app.route('/stake_asset', methods=['POST'])
@@ -578,11 +704,32 @@ def api_asset_staking_status(asset_id):
         logger.error(f"Error in asset_staking_status: {str(e)}", exc_info=True)
         return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
 
+def conditional_response(asset_id: str, build: Callable[[], Any]) -> Response:
+    """Serve build() tagged with the replicas' consensus version of the asset, or 304 if unchanged.
+
+    Without a consensus version the response is built untagged.
+    """
+    version = orchestrator.get_asset_versions([asset_id])[asset_id]
+    if version is None:
+        return build()
+
+    etag = str(version)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = make_response(build())
+        if response.status_code != 200:
+            return response
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
 @app.route('/asset_data/<asset_id>', methods=['GET'])
 def api_asset_data(asset_id):
     try:
-        data = orchestrator.get_asset_data(asset_id)
-        return jsonify({"asset_id": asset_id, "data": data})
+        return conditional_response(
+            asset_id, lambda: jsonify({"asset_id": asset_id, "data": orchestrator.get_asset_data(asset_id)})
+        )
     except Exception as e:
         logger.error(f"Error in asset_data: {str(e)}", exc_info=True)
         return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
@@ -590,8 +737,9 @@ def api_asset_data(asset_id):
 @app.route('/asset_history/<asset_id>', methods=['GET'])
 def api_asset_history(asset_id):
     try:
-        history = orchestrator.get_asset_history(asset_id)
-        return jsonify({"asset_id": asset_id, "history": history})
+        return conditional_response(
+            asset_id, lambda: jsonify({"asset_id": asset_id, "history": orchestrator.get_asset_history(asset_id)})
+        )
     except Exception as e:
         logger.error(f"Error in asset_history: {str(e)}", exc_info=True)
         return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
@@ -605,36 +753,81 @@ def api_verify_ownership():
         if not asset_id or not user_id:
             return jsonify({"success": False, "message": "Missing required parameters"}), 400
 
-        blockchains_with_asset = orchestrator._find_blockchains_with_asset(asset_id)
+        def build():
+            result = orchestrator.verify_ownerships([{"asset_id": asset_id, "user_id": user_id}])[0]
 
-        if not blockchains_with_asset:
-            return jsonify({
-                "success": True,
-                "asset_id": asset_id,
-                "user_id": user_id,
-                "is_owner": False,
-                "message": "Asset not found on any blockchain"
-            })
-
-        verified_count = 0
-        for url in blockchains_with_asset:
-            if orchestrator._verify_ownership(url, asset_id, user_id):
-                verified_count += 1
+            if not result["total_blockchains"]:
+                return jsonify({
+                    "success": True,
+                    "asset_id": asset_id,
+                    "user_id": user_id,
+                    "is_owner": False,
+                    "message": "Asset not found on any blockchain"
+                })
 
-        is_owner = verified_count >= orchestrator.min_consensus
+            return jsonify({"success": True, **result})
 
-        return jsonify({
-            "success": True,
-            "asset_id": asset_id,
-            "user_id": user_id,
-            "is_owner": is_owner,
-            "verified_count": verified_count,
-            "total_blockchains": len(blockchains_with_asset),
-            "min_consensus": orchestrator.min_consensus
-        })
+        return conditional_response(asset_id, build)
     except Exception as e:
         logger.error(f"Error in verify_ownership: {str(e)}", exc_info=True)
         return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
 
+def _bulk_list(data: Optional[Dict], key: str, item_type: type = None) -> List:
+    values = (data or {}).get(key)
+    if not isinstance(values, list):
+        raise ValueError(f"Request must include a {key} list")
+    if len(values) > MAX_BATCH_SIZE:
+        raise ValueError(f"Too many {key} ({len(values)}, at most {MAX_BATCH_SIZE})")
+    if item_type is not None and not all(isinstance(value, item_type) for value in values):
+        raise ValueError(f"Every entry in {key} must be a {item_type.__name__}")
+    return values
+
+@app.route('/asset_history_batch', methods=['POST'])
+def api_asset_history_batch():
+    try:
+        try:
+            asset_ids = _bulk_list(request.json, 'asset_ids', str)
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
+        histories = orchestrator.get_asset_histories(asset_ids)
+        return jsonify({"success": True, "histories": histories})
+    except Exception as e:
+        logger.error(f"Error in asset_history_batch: {str(e)}", exc_info=True)
+        return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
+
+@app.route('/asset_data_batch', methods=['POST'])
+def api_asset_data_batch():
+    try:
+        try:
+            asset_ids = _bulk_list(request.json, 'asset_ids', str)
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
+        data = orchestrator.get_assets_data(asset_ids)
+        return jsonify({"success": True, "data": data})
+    except Exception as e:
+        logger.error(f"Error in asset_data_batch: {str(e)}", exc_info=True)
+        return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
+
+@app.route('/verify_ownership_batch', methods=['POST'])
+def api_verify_ownership_batch():
+    try:
+        try:
+            pairs = _bulk_list(request.json, 'pairs')
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
+        if not all(isinstance(pair, dict) and pair.get('asset_id') and isinstance(pair['asset_id'], str)
+                   and pair.get('user_id') and isinstance(pair['user_id'], str) for pair in pairs):
+            return jsonify({"success": False, "message": "Each pair needs string asset_id and user_id"}), 400
+
+        results = orchestrator.verify_ownerships(pairs)
+        return jsonify({"success": True, "results": results})
+    except Exception as e:
+        logger.error(f"Error in verify_ownership_batch: {str(e)}", exc_info=True)
+        return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
+
 if __name__ == '__main__':
+    configure_logging()
     app.run(host='0.0.0.0', port=6000)
\ No newline at end of file
@@ -24,7 +24,7 @@ def is_port_in_use(port: int) -> bool:
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
         return s.connect_ex(('localhost', port)) == 0
 
-def start_blockchain_node(port: int, storage_path: str) -> subprocess.Popen:
+def start_blockchain_node(port: int, storage_path: str, backend: str = "json") -> subprocess.Popen:
 
     if is_port_in_use(port):
         logger.warning(f"Port {port} is already in use, skipping this node")
@@ -36,10 +36,11 @@ def start_blockchain_node(port: int, storage_path: str) -> subprocess.Popen:
         sys.executable,
         "blockchain.py",
         "--port", str(port),
-        "--storage", storage_path
+        "--storage", storage_path,
+        "--backend", backend
     ]
 
-    logger.info(f"Starting blockchain node on port {port} with storage {storage_path}")
+    logger.info(f"Starting blockchain node on port {port} with {backend} storage {storage_path}")
 
     process = subprocess.Popen(
         command,
@@ -151,8 +152,18 @@ def main():
 
     parser = argparse.ArgumentParser(description='Start a blockchain network with multiple nodes')
     parser.add_argument('-n', '--nodes', type=int, default=7, help='Number of blockchain nodes to start')
+    parser.add_argument('--backend', type=str, default="json", choices=["json", "sqlite", "binary"], help='Storage engine for every node')
+    parser.add_argument('--log-format', type=str, default=None, choices=["text", "json"], help='Log line format for every service')
+    parser.add_argument('--log-rate', type=float, default=None,
+                        help='INFO records per call site per second for every service, 0 for no limit')
     args = parser.parse_args()
 
+    # Children read these when they set up logging
+    if args.log_format is not None:
+        os.environ["INLOCK_LOG_FORMAT"] = args.log_format
+    if args.log_rate is not None:
+        os.environ["INLOCK_LOG_RATE"] = str(args.log_rate)
+
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
 
@@ -160,7 +171,7 @@ def main():
 
     for i in range(args.nodes):
         port = BASE_PORT + i
-        process = start_blockchain_node(port, storage_paths[i])
+        process = start_blockchain_node(port, storage_paths[i], args.backend)
         if process:
             processes.append(process)
             log_output(process, f"Blockchain-{port}")
@@ -0,0 +1,955 @@
+import os
+import json
+import mmap
+import time
+import uuid
+import zlib
+import sys
+import shutil
+import struct
+import sqlite3
+import logging
+import threading
+from concurrent.futures import Future
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Set, Any, Iterator
+
+from node import Node
+from wal import WriteAheadLog
+from metrics import REGISTRY
+
+logger = logging.getLogger('inlock_api')
+
+class IndexEntry(NamedTuple):
+    # The node fields the DAG's indexes are built from, read straight from
+    # storage without materializing (and rehashing) a Node
+    node_id: str
+    asset_id: str
+    action: str
+    user_id: str
+    timestamp: float
+    references: Tuple[str, ...]
+    data: Any
+
+class StorageBackend:
+    name = "base"
+
+    def __init__(self, storage_path: str):
+        self.storage_path = storage_path
+        self.last_checkpoint: Optional[Dict[str, Any]] = None
+        # Build nodes from persisted fields without recomputing their hashes
+        self.trusted_load = False
+
+    def has_data(self) -> bool:
+        raise NotImplementedError
+
+    def load(self) -> Tuple[MutableMapping, Set[str], List[Node]]:
+        # Returns the checkpointed node map and tips plus the nodes written
+        # after that checkpoint, which the DAG replays in order
+        raise NotImplementedError
+
+    def append(self, node: Node):
+        self.append_many([node])
+
+    def append_many(self, nodes: List[Node]):
+        # Persists the nodes in order with a single flush/fsync
+        raise NotImplementedError
+
+    def seal(self, nodes: MutableMapping, tips: Set[str]) -> Any:
+        # Called with the DAG write lock held; must be cheap
+        raise NotImplementedError
+
+    def write_checkpoint(self, sealed: Any) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def query_user_nodes(self, user_id: str) -> Optional[List[Node]]:
+        return None
+
+    def index_entries(self) -> Optional[Iterator[IndexEntry]]:
+        # Lazy backends yield every loaded node in append order; None means
+        # the node map is in memory and is indexed directly
+        return None
+
+    def close(self):
+        pass
+
+class JsonStorage(StorageBackend):
+    name = "json"
+
+    def __init__(self, storage_path: str):
+        super().__init__(storage_path)
+        self.log = WriteAheadLog(f"{storage_path}.log")
+
+    def has_data(self) -> bool:
+        return os.path.exists(self.storage_path) or self.log.has_records()
+
+    def _read_snapshot(self, path: str) -> Dict:
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def load(self) -> Tuple[MutableMapping, Set[str], List[Node]]:
+        if os.path.exists(self.storage_path):
+            try:
+                data = self._read_snapshot(self.storage_path)
+            except json.JSONDecodeError as e:
+                logger.error(f"JSON error loading blockchain: {str(e)}", exc_info=True)
+
+                backup_path = f"{self.storage_path}.bak"
+                if not os.path.exists(backup_path):
+                    raise
+                logger.info(f"Attempting to restore from backup {backup_path}")
+                data = self._read_snapshot(backup_path)
+        else:
+            data = {"nodes": {}, "tips": []}
+
+        nodes = {}
+        for node_data in data["nodes"].values():
+            node = Node.from_dict(node_data, trusted=self.trusted_load)
+            nodes[node.node_id] = node
+        tips = set(data["tips"])
+        self.last_checkpoint = data.get("checkpoint")
+
+        logger.info(f"Loaded {len(nodes)} nodes from blockchain storage")
+
+        tail = [Node.from_dict(record, trusted=self.trusted_load) for record in self.log.replay()]
+        return nodes, tips, tail
+
+    def append_many(self, nodes: List[Node]):
+        self.log.append_many([node.encode() for node in nodes])
+
+    def seal(self, nodes: MutableMapping, tips: Set[str]) -> Any:
+        # Nodes are never mutated after being added, so copying the
+        # references is enough to capture a consistent checkpoint
+        return self.log.rotate(), list(nodes.values()), list(tips)
+
+    def write_checkpoint(self, sealed: Any) -> Dict[str, Any]:
+        sealed_segments, nodes, tips = sealed
+        started = time.time()
+
+        if os.path.exists(self.storage_path):
+            backup_path = f"{self.storage_path}.bak"
+            try:
+                shutil.copy2(self.storage_path, backup_path)
+            except Exception as e:
+                logger.error(f"Failed to create backup: {str(e)}")
+
+        checkpoint = {
+            "created_at": started,
+            "node_count": len(nodes),
+            "tip_count": len(tips)
+        }
+
+        # Stitch the canonical node encodings together rather than building
+        # and re-serializing a dict of every node
+        temp_path = f"{self.storage_path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(b'{"nodes":{')
+            for i, node in enumerate(nodes):
+                if i:
+                    f.write(b",")
+                f.write(json.dumps(node.node_id).encode() + b":" + node.encode())
+            f.write(b'},"tips":' + json.dumps(tips).encode())
+            f.write(b',"checkpoint":' + json.dumps(checkpoint).encode() + b"}")
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temp_path, self.storage_path)
+
+        # Everything in the sealed segments is now part of the snapshot
+        self.log.remove_segments(sealed_segments)
+
+        self.last_checkpoint = dict(checkpoint)
+        checkpoint["duration_seconds"] = round(time.time() - started, 6)
+        checkpoint["compacted_segments"] = len(sealed_segments)
+        return checkpoint
+
+    def close(self):
+        self.log.close()
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    node_id TEXT NOT NULL UNIQUE,
+    asset_id TEXT NOT NULL,
+    action TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    recipient_id TEXT,
+    timestamp REAL NOT NULL,
+    refs TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_nodes_asset ON nodes(asset_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_nodes_user ON nodes(user_id);
+CREATE INDEX IF NOT EXISTS idx_nodes_recipient ON nodes(recipient_id);
+CREATE INDEX IF NOT EXISTS idx_nodes_timestamp ON nodes(timestamp);
+CREATE TABLE IF NOT EXISTS tips (
+    node_id TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+NODE_COLUMNS = "node_id, asset_id, action, user_id, timestamp, refs, signature, hash, data"
+
+def _row_to_node(row, trusted: bool = False) -> Node:
+    return Node.from_dict({
+        "node_id": row[0],
+        "asset_id": row[1],
+        "action": row[2],
+        "user_id": row[3],
+        "timestamp": row[4],
+        "references": json.loads(row[5]),
+        "signature": row[6],
+        "hash": row[7],
+        "data": json.loads(row[8])
+    }, trusted=trusted)
+
+class LazyNodeMap(MutableMapping):
+    # Node map over an on-disk store; nodes are materialized on access and
+    # only a bounded LRU of recently used nodes is kept in memory
+
+    def __init__(self, cache_size: int = 10000):
+        self._cache: 'OrderedDict[str, Node]' = OrderedDict()
+        self._cache_size = cache_size
+        # Concurrent readers reorder the LRU on every hit
+        self._cache_lock = threading.Lock()
+
+    def _fetch(self, node_id: str) -> Optional[Node]:
+        raise NotImplementedError
+
+    def _remember(self, node: Node):
+        with self._cache_lock:
+            self._cache[node.node_id] = node
+            self._cache.move_to_end(node.node_id)
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def __getitem__(self, node_id: str) -> Node:
+        with self._cache_lock:
+            node = self._cache.get(node_id)
+            if node is not None:
+                self._cache.move_to_end(node_id)
+        if node is not None:
+            return node
+
+        node = self._fetch(node_id)
+        if node is None:
+            raise KeyError(node_id)
+        self._remember(node)
+        return node
+
+    def __setitem__(self, node_id: str, node: Node):
+        # The record itself is written by the storage backend's append
+        self._remember(node)
+
+    def __delitem__(self, node_id: str):
+        raise TypeError("Nodes cannot be removed from the DAG")
+
+    def items(self):
+        for node in self.values():
+            yield node.node_id, node
+
+class SqliteNodeMap(LazyNodeMap):
+
+    def __init__(self, storage: 'SqliteStorage', cache_size: int = 10000):
+        super().__init__(cache_size)
+        self._storage = storage
+
+    def _fetch(self, node_id: str) -> Optional[Node]:
+        row = self._storage._fetchone(f"SELECT {NODE_COLUMNS} FROM nodes WHERE node_id = ?", (node_id,))
+        return _row_to_node(row, self._storage.trusted_load) if row is not None else None
+
+    def __contains__(self, node_id) -> bool:
+        if node_id in self._cache:
+            return True
+        return self._storage._fetchone("SELECT 1 FROM nodes WHERE node_id = ?", (node_id,)) is not None
+
+    def __len__(self) -> int:
+        row = self._storage._fetchone("SELECT COUNT(*) FROM nodes")
+        return row[0]
+
+    def __iter__(self) -> Iterator[str]:
+        for row in self._storage._stream("SELECT node_id FROM nodes ORDER BY seq"):
+            yield row[0]
+
+    def values(self):
+        for row in self._storage._stream(f"SELECT {NODE_COLUMNS} FROM nodes ORDER BY seq"):
+            node = self._cache.get(row[0])
+            yield node if node is not None else _row_to_node(row, self._storage.trusted_load)
+
+class SqliteStorage(StorageBackend):
+    name = "sqlite"
+
+    def __init__(self, storage_path: str):
+        if storage_path.endswith(".json"):
+            self.json_path = storage_path
+            storage_path = f"{os.path.splitext(storage_path)[0]}.sqlite3"
+        else:
+            self.json_path = None
+        super().__init__(storage_path)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(storage_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(SQLITE_SCHEMA)
+
+    def _fetchone(self, sql: str, params: Tuple = ()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _fetchall(self, sql: str, params: Tuple = ()) -> List:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _stream(self, sql: str, params: Tuple = (), chunk_size: int = 1000) -> Iterator[Tuple]:
+        # Full scans read from their own connection in chunks, so they never
+        # hold every row in memory or block writers on the shared connection
+        conn = sqlite3.connect(self.storage_path, check_same_thread=False)
+        try:
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+
+    def has_data(self) -> bool:
+        if self._fetchone("SELECT 1 FROM nodes LIMIT 1") is not None:
+            return True
+        return bool(self.json_path) and JsonStorage(self.json_path).has_data()
+
+    def load(self) -> Tuple[MutableMapping, Set[str], List[Node]]:
+        if self._fetchone("SELECT 1 FROM nodes LIMIT 1") is None and self.json_path:
+            self._import_json(self.json_path)
+
+        tips = {row[0] for row in self._fetchall("SELECT node_id FROM tips")}
+        row = self._fetchone("SELECT value FROM meta WHERE key = 'checkpoint'")
+        self.last_checkpoint = json.loads(row[0]) if row else None
+
+        nodes = SqliteNodeMap(self)
+        logger.info(f"Opened SQLite blockchain storage {self.storage_path} with {len(nodes)} nodes")
+        return nodes, tips, []
+
+    def _import_json(self, json_path: str):
+        source = JsonStorage(json_path)
+        if not source.has_data():
+            return
+
+        nodes, tips, tail = source.load()
+        for node in tail:
+            if node.node_id not in nodes:
+                nodes[node.node_id] = node
+                for ref in node.references:
+                    tips.discard(ref)
+                tips.add(node.node_id)
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    f"INSERT OR IGNORE INTO nodes ({NODE_COLUMNS}, recipient_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [self._node_row(node) for node in nodes.values()]
+                )
+                self._conn.execute("DELETE FROM tips")
+                self._conn.executemany("INSERT INTO tips (node_id) VALUES (?)", [(tip,) for tip in tips])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        source.close()
+
+        logger.info(f"Imported {len(nodes)} nodes from {json_path} into {self.storage_path}")
+
+    def _node_row(self, node: Node) -> Tuple:
+        return (
+            node.node_id,
+            node.asset_id,
+            node.action,
+            node.user_id,
+            node.timestamp,
+            json.dumps(node.references),
+            node.signature,
+            node.hash,
+            json.dumps(node.data),
+            node.data.get("recipient_id") if node.action == "transfer" else None
+        )
+
+    def append_many(self, nodes: List[Node]):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for node in nodes:
+                    self._conn.execute(
+                        f"INSERT INTO nodes ({NODE_COLUMNS}, recipient_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        self._node_row(node)
+                    )
+                    if node.references:
+                        self._conn.executemany("DELETE FROM tips WHERE node_id = ?", [(ref,) for ref in node.references])
+                    self._conn.execute("INSERT OR IGNORE INTO tips (node_id) VALUES (?)", (node.node_id,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def seal(self, nodes: MutableMapping, tips: Set[str]) -> Any:
+        # append_many keeps the tips table current in the same transaction
+        # as each write, so there is nothing to capture here; rewriting tips
+        # from an earlier copy would undo writes made since
+        return None
+
+    def write_checkpoint(self, sealed: Any) -> Dict[str, Any]:
+        started = time.time()
+
+        with self._lock:
+            node_count = self._conn.execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+            tip_count = self._conn.execute("SELECT COUNT(*) FROM tips").fetchone()[0]
+            checkpoint = {
+                "created_at": started,
+                "node_count": node_count,
+                "tip_count": tip_count
+            }
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('checkpoint', ?)",
+                (json.dumps(checkpoint),)
+            )
+
+            # Fold the SQLite WAL back into the main database file
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+        self.last_checkpoint = dict(checkpoint)
+        checkpoint["duration_seconds"] = round(time.time() - started, 6)
+        return checkpoint
+
+    def query_user_nodes(self, user_id: str) -> Optional[List[Node]]:
+        rows = self._fetchall(f"SELECT {NODE_COLUMNS} FROM nodes WHERE user_id = ?", (user_id,))
+        return [_row_to_node(row, self.trusted_load) for row in rows]
+
+    def index_entries(self) -> Optional[Iterator[IndexEntry]]:
+        sql = "SELECT node_id, asset_id, action, user_id, timestamp, refs, data FROM nodes ORDER BY seq"
+        for node_id, asset_id, action, user_id, timestamp, refs, data in self._stream(sql):
+            yield IndexEntry(
+                sys.intern(node_id), sys.intern(asset_id), sys.intern(action), sys.intern(user_id),
+                timestamp, tuple(sys.intern(ref) for ref in json.loads(refs)), json.loads(data)
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+ACTION_CODES = {"register": 1, "transfer": 2}
+ACTIONS_BY_CODE = {code: action for action, code in ACTION_CODES.items()}
+
+# Fixed-width record header: record length, crc32 of everything after the
+# crc, timestamp, action code, reference count, then the raw sha256
+# signature and hash digests. Variable-length ids and the JSON data follow.
+BINARY_HEADER = struct.Struct(">IIdBB32s32s")
+BINARY_CRC_OFFSET = 8
+
+def _pack_id(value: str) -> bytes:
+    # Canonical UUIDs (every generated node id) take 17 bytes instead of 36
+    try:
+        if str(uuid.UUID(value)) == value:
+            return b"\x00" + uuid.UUID(value).bytes
+    except ValueError:
+        pass
+    encoded = value.encode()
+    if not 0 < len(encoded) < 256:
+        raise ValueError(f"Identifier too long for binary storage: {value[:32]}...")
+    return bytes([len(encoded)]) + encoded
+
+def _unpack_id(buf, offset: int) -> Tuple[str, int]:
+    length = buf[offset]
+    if length == 0:
+        return str(uuid.UUID(bytes=bytes(buf[offset + 1:offset + 17]))), offset + 17
+    return bytes(buf[offset + 1:offset + 1 + length]).decode(), offset + 1 + length
+
+def _pack_text(value: str) -> bytes:
+    encoded = value.encode()
+    return struct.pack(">H", len(encoded)) + encoded
+
+def _unpack_text(buf, offset: int) -> Tuple[str, int]:
+    (length,) = struct.unpack_from(">H", buf, offset)
+    start = offset + 2
+    return bytes(buf[start:start + length]).decode(), start + length
+
+def encode_binary_node(node: Node) -> bytes:
+    try:
+        signature = bytes.fromhex(node.signature)
+        digest = bytes.fromhex(node.hash)
+    except ValueError:
+        raise ValueError(f"Node {node.node_id} does not carry sha256 hex digests")
+    if len(signature) != 32 or len(digest) != 32:
+        raise ValueError(f"Node {node.node_id} does not carry sha256 hex digests")
+
+    data = json.dumps(node.data, separators=(",", ":")).encode()
+    body = b"".join([
+        _pack_id(node.node_id),
+        _pack_text(node.asset_id),
+        _pack_text(node.user_id),
+        b"".join(_pack_id(ref) for ref in node.references),
+        struct.pack(">I", len(data)),
+        data
+    ])
+
+    header = BINARY_HEADER.pack(
+        BINARY_HEADER.size + len(body), 0, node.timestamp,
+        ACTION_CODES[node.action], len(node.references), signature, digest
+    )
+    record = header + body
+    checksum = zlib.crc32(record[BINARY_CRC_OFFSET:])
+    return record[:4] + struct.pack(">I", checksum) + record[BINARY_CRC_OFFSET:]
+
+def _scan_binary_record(buf, offset: int) -> Tuple[str, List[str], int]:
+    # Reads only the id and references of a record, for index rebuilds
+    length, checksum, _, _, ref_count, _, _ = BINARY_HEADER.unpack_from(buf, offset)
+    end = offset + length
+    if length < BINARY_HEADER.size or end > len(buf):
+        raise ValueError("Truncated binary record")
+    if zlib.crc32(buf[offset + BINARY_CRC_OFFSET:end]) != checksum:
+        raise ValueError("Binary record checksum mismatch")
+
+    pos = offset + BINARY_HEADER.size
+    node_id, pos = _unpack_id(buf, pos)
+    _, pos = _unpack_text(buf, pos)
+    _, pos = _unpack_text(buf, pos)
+    references = []
+    for _ in range(ref_count):
+        ref, pos = _unpack_id(buf, pos)
+        references.append(ref)
+    return node_id, references, end
+
+def _index_binary_record(buf, offset: int) -> IndexEntry:
+    # Everything decode_binary_node reads except the digests, without
+    # building a Node
+    _, _, timestamp, action_code, ref_count, _, _ = BINARY_HEADER.unpack_from(buf, offset)
+
+    pos = offset + BINARY_HEADER.size
+    node_id, pos = _unpack_id(buf, pos)
+    asset_id, pos = _unpack_text(buf, pos)
+    user_id, pos = _unpack_text(buf, pos)
+    references = []
+    for _ in range(ref_count):
+        ref, pos = _unpack_id(buf, pos)
+        references.append(sys.intern(ref))
+    (data_length,) = struct.unpack_from(">I", buf, pos)
+    data = json.loads(bytes(buf[pos + 4:pos + 4 + data_length]))
+
+    return IndexEntry(
+        sys.intern(node_id), sys.intern(asset_id), ACTIONS_BY_CODE[action_code], sys.intern(user_id),
+        timestamp, tuple(references), data
+    )
+
+def decode_binary_node(buf, offset: int, trusted: bool = False) -> Node:
+    _, _, timestamp, action_code, ref_count, signature, digest = BINARY_HEADER.unpack_from(buf, offset)
+
+    pos = offset + BINARY_HEADER.size
+    node_id, pos = _unpack_id(buf, pos)
+    asset_id, pos = _unpack_text(buf, pos)
+    user_id, pos = _unpack_text(buf, pos)
+    references = []
+    for _ in range(ref_count):
+        ref, pos = _unpack_id(buf, pos)
+        references.append(ref)
+    (data_length,) = struct.unpack_from(">I", buf, pos)
+    data = json.loads(bytes(buf[pos + 4:pos + 4 + data_length]))
+
+    return Node.from_dict({
+        "node_id": node_id,
+        "asset_id": asset_id,
+        "action": ACTIONS_BY_CODE[action_code],
+        "user_id": user_id,
+        "timestamp": timestamp,
+        "references": references,
+        "signature": signature.hex(),
+        "hash": digest.hex(),
+        "data": data
+    }, trusted=trusted)
+
+class BinaryNodeMap(LazyNodeMap):
+
+    def __init__(self, storage: 'BinaryStorage', offsets: Dict[str, int], cache_size: int = 10000):
+        super().__init__(cache_size)
+        self._storage = storage
+        self._offsets = offsets
+        # Nodes applied by the DAG before group commit has written them;
+        # pinned in memory until their offset is known
+        self._unflushed: Dict[str, Node] = {}
+
+    def _fetch(self, node_id: str) -> Optional[Node]:
+        node = self._unflushed.get(node_id)
+        if node is not None:
+            return node
+        offset = self._offsets.get(node_id)
+        return self._storage._decode_at(offset) if offset is not None else None
+
+    def __setitem__(self, node_id: str, node: Node):
+        if node_id not in self._offsets:
+            self._unflushed[node_id] = node
+        super().__setitem__(node_id, node)
+
+    def _flushed(self, node_id: str):
+        self._unflushed.pop(node_id, None)
+
+    def __contains__(self, node_id) -> bool:
+        return node_id in self._offsets or node_id in self._unflushed
+
+    def __len__(self) -> int:
+        return len(self._offsets) + len([i for i in list(self._unflushed) if i not in self._offsets])
+
+    def __iter__(self) -> Iterator[str]:
+        # Ids come from the offset index; no record is decoded
+        node_ids = list(self._offsets)
+        node_ids.extend(node_id for node_id in list(self._unflushed) if node_id not in self._offsets)
+        return iter(node_ids)
+
+    def values(self):
+        for node_id, offset in list(self._offsets.items()):
+            node = self._cache.get(node_id)
+            yield node if node is not None else self._storage._decode_at(offset)
+        for node_id, node in list(self._unflushed.items()):
+            if node_id not in self._offsets:
+                yield node
+
+class BinaryStorage(StorageBackend):
+    name = "binary"
+
+    def __init__(self, storage_path: str):
+        if storage_path.endswith(".json"):
+            self.json_path = storage_path
+            storage_path = f"{os.path.splitext(storage_path)[0]}.dagbin"
+        else:
+            self.json_path = None
+        super().__init__(storage_path)
+
+        self.index_path = f"{storage_path}.idx"
+        self._lock = threading.Lock()
+        self._file = open(storage_path, "ab")
+        self._map: Optional[mmap.mmap] = None
+        self._mapped_size = 0
+        self._offsets: Dict[str, int] = {}
+        self._node_map: Optional[BinaryNodeMap] = None
+
+    def _view(self, needed: int) -> mmap.mmap:
+        # Remap lazily once reads reach past the end of the current mapping
+        if self._map is None or needed > self._mapped_size:
+            if self._map is not None:
+                self._map.close()
+            with open(self.storage_path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_size = len(self._map)
+        return self._map
+
+    def _decode_at(self, offset: int) -> Node:
+        with self._lock:
+            view = self._view(offset + BINARY_HEADER.size)
+            (length,) = struct.unpack_from(">I", view, offset)
+            view = self._view(offset + length)
+            return decode_binary_node(view, offset, self.trusted_load)
+
+    def _index_at(self, offset: int) -> IndexEntry:
+        with self._lock:
+            view = self._view(offset + BINARY_HEADER.size)
+            (length,) = struct.unpack_from(">I", view, offset)
+            view = self._view(offset + length)
+            return _index_binary_record(view, offset)
+
+    def has_data(self) -> bool:
+        if os.path.getsize(self.storage_path) > 0:
+            return True
+        return bool(self.json_path) and JsonStorage(self.json_path).has_data()
+
+    def load(self) -> Tuple[MutableMapping, Set[str], List[Node]]:
+        if os.path.getsize(self.storage_path) == 0 and self.json_path:
+            self._import_json(self.json_path)
+
+        offsets: Dict[str, int] = {}
+        tips: Set[str] = set()
+        covered = 0
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, "r") as f:
+                    index = json.load(f)
+                offsets = index["offsets"]
+                tips = set(index["tips"])
+                covered = index["covered"]
+                self.last_checkpoint = index.get("checkpoint")
+            except (ValueError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable offset index {self.index_path}: {str(e)}")
+                offsets, tips, covered = {}, set(), 0
+
+        size = os.path.getsize(self.storage_path)
+        if covered > size:
+            logger.warning(f"Offset index {self.index_path} is ahead of the data file, rebuilding")
+            offsets, tips, covered = {}, set(), 0
+
+        # Records appended after the last index checkpoint are scanned for
+        # their ids and references only; nothing is materialized here
+        scanned = 0
+        offset = covered
+        if size > covered:
+            view = self._view(size)
+            while offset < size:
+                try:
+                    node_id, references, end = _scan_binary_record(view, offset)
+                except (ValueError, struct.error):
+                    break
+                offsets[node_id] = offset
+                for ref in references:
+                    tips.discard(ref)
+                tips.add(node_id)
+                offset = end
+                scanned += 1
+
+        if offset < size:
+            logger.warning(f"Discarding {size - offset} bytes of torn record tail in {self.storage_path}")
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._file.truncate(offset)
+            # truncate() leaves the position alone; appends read it via tell()
+            self._file.seek(offset)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+        logger.info(f"Opened binary blockchain storage {self.storage_path} with {len(offsets)} nodes "
+                    f"({scanned} scanned past the offset index)")
+        self._offsets = offsets
+        self._node_map = BinaryNodeMap(self, offsets)
+        return self._node_map, tips, []
+
+    def _import_json(self, json_path: str):
+        source = JsonStorage(json_path)
+        if not source.has_data():
+            return
+
+        nodes, _, tail = source.load()
+        records = [encode_binary_node(node) for node in nodes.values()]
+        records.extend(encode_binary_node(node) for node in tail if node.node_id not in nodes)
+        self._file.write(b"".join(records))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        source.close()
+
+        logger.info(f"Imported {len(records)} nodes from {json_path} into {self.storage_path}")
+
+    def append_many(self, nodes: List[Node]):
+        records = [encode_binary_node(node) for node in nodes]
+        with self._lock:
+            start = self._file.tell()
+            try:
+                self._file.write(b"".join(records))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except Exception:
+                self._file.truncate(start)
+                self._file.seek(start)
+                raise
+
+            offset = start
+            for node, record in zip(nodes, records):
+                self._offsets[node.node_id] = offset
+                offset += len(record)
+                if self._node_map is not None:
+                    self._node_map._flushed(node.node_id)
+
+    def seal(self, nodes: MutableMapping, tips: Set[str]) -> Any:
+        with self._lock:
+            covered = self._file.tell()
+            offsets = dict(self._offsets)
+        return covered, offsets, list(tips)
+
+    def write_checkpoint(self, sealed: Any) -> Dict[str, Any]:
+        covered, offsets, tips = sealed
+        started = time.time()
+
+        checkpoint = {
+            "created_at": started,
+            "node_count": len(offsets),
+            "tip_count": len(tips)
+        }
+        index = {
+            "covered": covered,
+            "offsets": offsets,
+            "tips": tips,
+            "checkpoint": checkpoint
+        }
+
+        temp_path = f"{self.index_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(index, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.index_path)
+
+        self.last_checkpoint = dict(checkpoint)
+        checkpoint["duration_seconds"] = round(time.time() - started, 6)
+        return checkpoint
+
+    def index_entries(self) -> Optional[Iterator[IndexEntry]]:
+        for offset in list(self._offsets.values()):
+            yield self._index_at(offset)
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._file.close()
+
+DURABILITY_POLICIES = ("sync-per-write", "group-commit", "async")
+
+STORAGE_APPEND_SECONDS = REGISTRY.histogram(
+    "storage_append_duration_seconds", "Time to persist one batch of nodes", ("backend",)
+)
+
+class GroupCommitter:
+    # Persists nodes handed over by the DAG on a background thread. Writes
+    # that arrive within one commit window share a single flush/fsync.
+
+    def __init__(
+        self,
+        storage: StorageBackend,
+        window_ms: float = 5.0,
+        max_batch: int = 1000,
+        on_failure: Optional[Callable[[Exception], None]] = None
+    ):
+        self.storage = storage
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        # Called on the commit thread after a failed batch, before its
+        # writers are told, so the owner can discard what never persisted
+        self.on_failure = on_failure
+        self.stats = {"batches": 0, "records": 0, "failed_batches": 0, "largest_batch": 0}
+
+        # Commit units: the nodes of one unit always land in the same batch
+        self._pending: List[Tuple[List[Node], Future]] = []
+        # Futures of the batch being written, and whether on_failure is
+        # still recovering from a failed one
+        self._inflight: List[Future] = []
+        self._recovering = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="dag-group-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, node: Node) -> Future:
+        return self.submit_many([node])
+
+    def submit_many(self, nodes: List[Node]) -> Future:
+        """Queue nodes to be persisted together in a single append.
+
+        The unit is never split across commits, even past max_batch, so
+        the returned future resolves once for all of them.
+        """
+        future = Future()
+        with self._cond:
+            self._pending.append((list(nodes), future))
+            # wait_idle callers share the condition with the commit thread
+            self._cond.notify_all()
+        return future
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+
+            # Let the window fill up before taking the batch
+            time.sleep(self.window)
+
+            with self._cond:
+                # Whole units up to max_batch nodes, but always at least one
+                batch = []
+                count = 0
+                while self._pending and (not batch or count + len(self._pending[0][0]) <= self.max_batch):
+                    unit = self._pending.pop(0)
+                    batch.append(unit)
+                    count += len(unit[0])
+                self._inflight = [future for _, future in batch]
+
+            self._commit(batch)
+
+            with self._cond:
+                self._inflight = []
+                self._cond.notify_all()
+
+    def _commit(self, batch: List[Tuple[List[Node], Future]]):
+        nodes = [node for unit, _ in batch for node in unit]
+        try:
+            with STORAGE_APPEND_SECONDS.time(backend=self.storage.name):
+                self.storage.append_many(nodes)
+        except Exception as e:
+            self.stats["failed_batches"] += 1
+            logger.error(f"Group commit of {len(nodes)} nodes failed: {str(e)}", exc_info=True)
+            if self.on_failure is not None:
+                with self._cond:
+                    self._recovering = True
+                    self._cond.notify_all()
+                try:
+                    self.on_failure(e)
+                except Exception as recovery_error:
+                    logger.error(f"Recovery after failed group commit failed: {str(recovery_error)}", exc_info=True)
+                finally:
+                    with self._cond:
+                        self._recovering = False
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.stats["batches"] += 1
+        self.stats["records"] += len(nodes)
+        self.stats["largest_batch"] = max(self.stats["largest_batch"], len(nodes))
+        for _, future in batch:
+            future.set_result(True)
+
+    def drain(self) -> List[Future]:
+        """Take every write still waiting for a commit window without persisting it."""
+        with self._cond:
+            pending = [future for _, future in self._pending]
+            self._pending = []
+        return pending
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """Wait until every submitted write has been committed or failed.
+
+        Returns False on timeout, or as soon as a failed batch is being
+        recovered: on_failure may need locks the caller is holding.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._cond:
+            while self._pending or self._inflight:
+                if self._recovering:
+                    return False
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def flush(self, timeout: float = None):
+        with self._cond:
+            pending = self._inflight + [future for _, future in self._pending]
+        for future in pending:
+            try:
+                future.result(timeout)
+            except Exception:
+                pass
+
+BACKENDS = {
+    JsonStorage.name: JsonStorage,
+    SqliteStorage.name: SqliteStorage,
+    BinaryStorage.name: BinaryStorage
+}
+
+def create_storage(backend: str, storage_path: str) -> StorageBackend:
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown storage backend: {backend}. Must be one of {set(BACKENDS)}")
+    return BACKENDS[backend](storage_path)
@@ -0,0 +1,63 @@
+import time
+import random
+from collections import OrderedDict
+from typing import Dict, List, Any
+
+class TipSelector:
+    """Chooses references among the current tips, favouring the oldest ones.
+
+    Tips are kept oldest first. Every selection approves the oldest tip and
+    draws the rest with probability proportional to age rank, so stale tips
+    are absorbed quickly and the tip set shrinks towards its lower bound
+    instead of growing with write concurrency.
+    """
+
+    def __init__(self, max_samples: int = 64):
+        # tip node_id -> timestamp of the tip node, oldest first
+        self._tips: 'OrderedDict[str, float]' = OrderedDict()
+        self.max_samples = max_samples
+        self.max_observed = 0
+
+    def reset(self, tips: Dict[str, float]):
+        self._tips = OrderedDict(sorted(tips.items(), key=lambda item: item[1]))
+        self.max_observed = max(self.max_observed, len(self._tips))
+
+    def add(self, node_id: str, timestamp: float):
+        self._tips[node_id] = timestamp
+        if len(self._tips) > self.max_observed:
+            self.max_observed = len(self._tips)
+
+    def remove(self, node_id: str):
+        self._tips.pop(node_id, None)
+
+    def choose(self, count: int = 2) -> List[str]:
+        if len(self._tips) <= count:
+            return list(self._tips)
+
+        oldest = iter(self._tips)
+        chosen = [next(oldest)]
+
+        # Age-rank weights over the oldest max_samples tips; anything newer
+        # is left for later writers, which keeps selection O(max_samples)
+        candidates = []
+        for node_id in oldest:
+            candidates.append(node_id)
+            if len(candidates) >= self.max_samples:
+                break
+        weights = list(range(len(candidates), 0, -1))
+
+        while len(chosen) < count and candidates:
+            pick = random.choices(range(len(candidates)), weights=weights)[0]
+            chosen.append(candidates.pop(pick))
+            weights.pop(pick)
+        return chosen
+
+    def metrics(self, now: float = None) -> Dict[str, Any]:
+        now = now if now is not None else time.time()
+        ages = [now - timestamp for timestamp in self._tips.values()]
+        return {
+            "count": len(ages),
+            "max_observed": self.max_observed,
+            "oldest_age_seconds": round(max(ages), 3) if ages else 0.0,
+            "mean_age_seconds": round(sum(ages) / len(ages), 3) if ages else 0.0
+        }
@@ -0,0 +1,139 @@
+import os
+import re
+import glob
+import json
+import zlib
+import struct
+import logging
+import threading
+from typing import Dict, List, Union
+
+logger = logging.getLogger('inlock_api')
+
+# Each record is framed as <payload length><crc32 of payload><payload>, big-endian.
+RECORD_HEADER = struct.Struct(">II")
+
+class WriteAheadLog:
+
+    def __init__(self, path: str, fsync: bool = True):
+        self.path = path
+        self.fsync = fsync
+        self._file = None
+        self._lock = threading.RLock()
+
+    def _open(self):
+        if self._file is None or self._file.closed:
+            self._file = open(self.path, "ab")
+        return self._file
+
+    def append(self, record: Dict):
+        self.append_many([record])
+
+    def append_many(self, records: List[Union[Dict, bytes]]):
+        frames = []
+        for record in records:
+            # Callers may hand over records they have already encoded
+            payload = record if isinstance(record, bytes) else json.dumps(record, separators=(",", ":")).encode()
+            frames.append(RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+
+        with self._lock:
+            f = self._open()
+            start = f.tell()
+            try:
+                f.write(b"".join(frames))
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            except Exception:
+                # Never leave a half-written frame in front of future appends
+                try:
+                    f.truncate(start)
+                except Exception as e:
+                    logger.error(f"Failed to roll back partial log record in {self.path}: {str(e)}")
+                raise
+
+    def sealed_segments(self) -> List[str]:
+        pattern = re.compile(re.escape(self.path) + r"\.(\d+)$")
+        segments = [p for p in glob.glob(f"{glob.escape(self.path)}.*") if pattern.match(p)]
+        return sorted(segments, key=lambda p: int(pattern.match(p).group(1)))
+
+    def rotate(self) -> List[str]:
+        with self._lock:
+            self.close()
+            if self.exists():
+                sealed = self.sealed_segments()
+                next_index = int(sealed[-1].rsplit(".", 1)[1]) + 1 if sealed else 1
+                os.replace(self.path, f"{self.path}.{next_index:08d}")
+            return self.sealed_segments()
+
+    def remove_segments(self, segments: List[str]):
+        for segment in segments:
+            try:
+                os.remove(segment)
+            except FileNotFoundError:
+                pass
+
+    def replay(self) -> List[Dict]:
+        records = []
+        for segment in self.sealed_segments() + [self.path]:
+            records.extend(self._replay_segment(segment))
+        return records
+
+    def _replay_segment(self, path: str) -> List[Dict]:
+        if not os.path.exists(path):
+            return []
+
+        with open(path, "rb") as f:
+            buf = f.read()
+
+        records = []
+        offset = 0
+        while offset + RECORD_HEADER.size <= len(buf):
+            length, checksum = RECORD_HEADER.unpack_from(buf, offset)
+            start = offset + RECORD_HEADER.size
+            end = start + length
+            if end > len(buf):
+                break
+
+            payload = buf[start:end]
+            if zlib.crc32(payload) != checksum:
+                break
+
+            try:
+                records.append(json.loads(payload))
+            except ValueError:
+                break
+
+            offset = end
+
+        if offset < len(buf):
+            logger.warning(f"Discarding {len(buf) - offset} bytes of torn log tail in {path}")
+            if path == self.path:
+                self.close()
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+                f.flush()
+                os.fsync(f.fileno())
+
+        return records
+
+    def truncate(self):
+        with self._lock:
+            self.close()
+            self.remove_segments(self.sealed_segments())
+            if os.path.exists(self.path):
+                with open(self.path, "r+b") as f:
+                    f.truncate(0)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path) and os.path.getsize(self.path) > 0
+
+    def has_records(self) -> bool:
+        return self.exists() or bool(self.sealed_segments())
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+        self._file = None
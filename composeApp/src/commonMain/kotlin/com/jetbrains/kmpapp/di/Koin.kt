@@ -19,6 +19,7 @@ import com.jetbrains.kmpapp.screens.qrcode.createQRCodeService
 import io.ktor.client.HttpClient
 import io.ktor.client.plugins.contentnegotiation.ContentNegotiation
 import io.ktor.client.plugins.HttpTimeout
+import io.ktor.client.plugins.cache.HttpCache
 import io.ktor.http.ContentType
 import io.ktor.serialization.kotlinx.json.json
 import kotlinx.serialization.json.Json
@@ -46,6 +47,9 @@ val dataModule = module {
                 requestTimeoutMillis = 30000
                 socketTimeoutMillis = 15000
             }
+
+            // Revalidates polled asset reads with If-None-Match
+            install(HttpCache)
         }
     }
 